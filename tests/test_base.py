@@ -1,4 +1,8 @@
+import pickle
+import numpy as np
 from writeprints_static.base import WriteprintsStatic
+from scipy.sparse import vstack
+from sklearn.base import clone
 import pytest
 
 
@@ -59,3 +63,156 @@ def test_get_feature_names():
     assert feature_names[50] == "letter_x"
     assert feature_names[265] == "function_word_thousand"
     assert feature_names[548] == "punctuation_single_quotes"
+
+
+def test_retains_nothing_by_default():
+    texts = ["This is a text.", "This is another text."]
+    vec = WriteprintsStatic()
+    vec.transform(texts)
+    assert vec.raws is None
+    assert vec.docs is None
+    assert vec.tags is None
+    assert vec.word_tokens is None
+
+
+def test_retain():
+    texts = ["This is a text.", "This is another text.", "A third one."]
+    vec = WriteprintsStatic(retain=["word_tokens"], batch_size=2)
+    vec.transform(texts)
+    assert vec.docs is None
+    assert vec.word_tokens.to_lists() == [
+        ["this", "is", "a", "text"],
+        ["this", "is", "another", "text"],
+        ["a", "third", "one"],
+    ]
+
+
+def test_retain_unknown():
+    vec = WriteprintsStatic(retain=["nlp"])
+    with pytest.raises(ValueError):
+        vec.transform(["This is a text."])
+
+
+def test_iter_transform():
+    texts = ["This is a text.", "This is another text.", "A third one."]
+    vec = WriteprintsStatic(batch_size=2)
+    batches = list(vec.iter_transform(texts))
+    assert [batch.shape[0] for batch in batches] == [2, 1]
+    X = WriteprintsStatic().transform(texts)
+    assert (vstack(batches) != X).nnz == 0
+
+
+def test_get_feature_names_out_before_transform():
+    feature_names = WriteprintsStatic().get_feature_names_out()
+    assert len(feature_names) == 552
+    assert feature_names[50] == "letter_x"
+
+
+def test_get_params():
+    vec = WriteprintsStatic(batch_size=10, n_jobs=2)
+    params = clone(vec).get_params()
+    assert params["batch_size"] == 10
+    assert params["n_jobs"] == 2
+    assert params["model"] == "en_core_web_sm"
+
+
+def test_pickle():
+    texts = ["This is a text.", "This is another text."]
+    vec = WriteprintsStatic()
+    X = vec.transform(texts)
+    restored = pickle.loads(pickle.dumps(vec))
+    assert restored.get_params() == vec.get_params()
+    assert (restored.transform(texts) != X).nnz == 0
+
+
+def test_n_jobs():
+    texts = ["This is a text.", "This is another text.", "A third one."]
+    X = WriteprintsStatic(batch_size=1, n_jobs=2).transform(texts)
+    assert (WriteprintsStatic().transform(texts) != X).nnz == 0
+
+
+def test_deduplicate():
+    texts = ["This is a text.", "Another one.", "This is a text.", "This is a text."]
+    vec = WriteprintsStatic(retain=["raws"])
+    X = vec.transform(texts)
+    assert vec.raws == ["This is a text.", "Another one."]
+    assert X.shape[0] == 4
+    assert (X[0] != X[2]).nnz == 0
+    assert (X[0] != X[3]).nnz == 0
+    Y = WriteprintsStatic(deduplicate=False).transform(texts)
+    assert (X != Y).nnz == 0
+
+
+def test_deduplicate_batch():
+    texts = ["This is a text.", "Another one.", "This is a text."]
+    vec = WriteprintsStatic(batch_size=3, retain=["raws"])
+    (X,) = vec.iter_transform(texts)
+    assert vec.raws == ["This is a text.", "Another one."]
+    assert (X[0] != X[2]).nnz == 0
+
+
+def test_n_ngrams():
+    texts = ["This is a text.", "This is another text."]
+    vec = WriteprintsStatic(n_ngrams=5)
+    X = vec.fit_transform(texts)
+    assert X.shape == (2, len(vec.get_feature_names()))
+    assert "bigram_th" in vec.get_feature_names()
+    assert "trigram_thi" in vec.get_feature_names()
+    assert "bigram_ea" not in vec.get_feature_names()
+    with pytest.raises(ValueError):
+        WriteprintsStatic(n_ngrams=5).transform(texts)
+
+
+def test_errors_raise():
+    vec = WriteprintsStatic()
+    with pytest.raises(ValueError):
+        vec.transform(["This is a text.", "   "])
+    with pytest.raises(ValueError):
+        vec.transform(["This is a text.", "!!!"])
+
+
+def test_errors_skip():
+    texts = ["This is a text.", "", None, "   ", "!!!", "This is a text."]
+    vec = WriteprintsStatic(errors="skip", batch_size=4)
+    X = vec.transform(texts)
+    assert vec.valid_mask_.tolist() == [True, False, False, False, False, True]
+    assert X.shape[0] == 2
+    assert (X[0] != X[1]).nnz == 0
+    assert sum(Y.shape[0] for Y in vec.iter_transform(texts)) == 2
+    assert vec.valid_mask_.tolist() == [True, False, False, False, False, True]
+
+
+def test_errors_fill():
+    texts = ["This is a text.", 8, "This is another text."]
+    X = WriteprintsStatic(errors="fill").transform(texts).toarray()
+    assert np.isnan(X[1]).all()
+    assert not np.isnan(X[[0, 2]]).any()
+    X = WriteprintsStatic(errors="fill", fill_value=0).transform(texts)
+    assert X[1].nnz == 0
+
+
+def test_errors_whole_batch_invalid():
+    texts = ["Some words.", "Other words.", "", "   ", None, "Last words."]
+    expected = WriteprintsStatic().transform(
+        ["Some words.", "Other words.", "Last words."]
+    )
+    vec = WriteprintsStatic(errors="skip", batch_size=2)
+    assert (vec.transform(texts) != expected).nnz == 0
+    assert [Y.shape[0] for Y in vec.iter_transform(texts)] == [2, 0, 1]
+    vec = WriteprintsStatic(errors="fill", batch_size=2, deduplicate=False)
+    X = vec.transform(texts).toarray()
+    assert np.isnan(X[2:5]).all()
+    assert vec.valid_mask_.tolist() == [True, True, False, False, False, True]
+
+
+def test_memory_budget():
+    texts = [
+        "A short one.",
+        "This is a text. " * 30,
+        "This is another text.",
+        "Hi there.",
+    ]
+    X = WriteprintsStatic().transform(texts)
+    vec = WriteprintsStatic(memory_budget=1, batch_size=2)
+    assert (vec.transform(texts) != X).nnz == 0
+    assert (vstack(list(vec.iter_transform(texts))) != X).nnz == 0
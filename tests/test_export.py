@@ -0,0 +1,47 @@
+import numpy as np
+from scipy.sparse import random as sparse_random, vstack
+from writeprints_static.export import CSRWriter, open_writer, read_csr
+import pytest
+
+feature_names = ["f" + str(i) for i in range(6)]
+chunks = [
+    sparse_random(n, 6, density=0.4, format="csr", random_state=seed)
+    for seed, n in enumerate([3, 0, 5])
+]
+
+
+def test_csr_round_trip(tmp_path):
+    with CSRWriter(tmp_path / "X", feature_names) as writer:
+        for X in chunks:
+            writer.write(X)
+    X, names = read_csr(tmp_path / "X")
+    assert names == feature_names
+    assert X.shape == (8, 6)
+    assert (X != vstack(chunks)).nnz == 0
+    # backed by the mapped files rather than copies
+    assert not X.data.flags.owndata
+    assert not X.indices.flags.owndata
+    assert not X.indptr.flags.owndata
+
+
+def test_wrong_width(tmp_path):
+    with CSRWriter(tmp_path / "X", feature_names[:5]) as writer:
+        with pytest.raises(ValueError):
+            writer.write(chunks[0])
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_arrow_round_trip(tmp_path, format):
+    pytest.importorskip("pyarrow")
+    from writeprints_static.export import read_arrow, read_parquet
+
+    path = tmp_path / ("X." + format)
+    with open_writer(path, feature_names, format) as writer:
+        for X in chunks:
+            writer.write(X)
+    table = read_arrow(path) if format == "arrow" else read_parquet(path)
+    assert table.column_names == feature_names
+    assert np.allclose(
+        np.column_stack([table[name].to_numpy() for name in feature_names]),
+        vstack(chunks).toarray(),
+    )
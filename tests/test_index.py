@@ -0,0 +1,86 @@
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.spatial.distance import cdist
+from writeprints_static.index import WriteprintsIndex
+import pytest
+
+rng = np.random.default_rng(0)
+references = rng.gamma(2.0, size=(50, 12)).astype(np.float32)
+queries = rng.gamma(2.0, size=(4, 12)).astype(np.float32)
+
+
+def brute_force(metric):
+    if metric == "delta":
+        mean, std = references.mean(axis=0), references.std(axis=0)
+        return (
+            cdist((queries - mean) / std, (references - mean) / std, "cityblock") / 12
+        )
+    if metric == "minmax":
+        return 1 - cdist(
+            queries,
+            references,
+            lambda u, v: np.minimum(u, v).sum() / np.maximum(u, v).sum(),
+        )
+    return cdist(queries, references, {"manhattan": "cityblock"}.get(metric, metric))
+
+
+@pytest.mark.parametrize("metric", ["cosine", "manhattan", "delta", "minmax"])
+def test_query(metric):
+    index = WriteprintsIndex(metric=metric, block_size=7)
+    index.add(csr_matrix(references[:20]), list(range(20)))
+    index.add(references[20:], list(range(20, 50)))
+    distances, indices = index.query(queries, k=3)
+    expected = brute_force(metric)
+    assert indices.shape == (4, 3)
+    assert (indices == np.argsort(expected, axis=1)[:, :3]).all()
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :3], atol=1e-5)
+
+
+def test_query_more_than_indexed():
+    index = WriteprintsIndex().add(references[:2], ["a", "b"])
+    distances, indices = index.query(queries, k=5)
+    assert indices.shape == (4, 2)
+
+
+def test_save_load(tmp_path):
+    index = WriteprintsIndex(metric="manhattan").add(references[:30], list(range(30)))
+    index.save(tmp_path / "index")
+    loaded = WriteprintsIndex.load(tmp_path / "index")
+    assert isinstance(loaded.vectors_, np.memmap)
+    assert loaded.metric == "manhattan"
+    assert loaded.labels_ == list(range(30))
+    loaded.add(references[30:], list(range(30, 50)))
+    _, indices = loaded.query(queries, k=3)
+    assert (indices == np.argsort(brute_force("manhattan"), axis=1)[:, :3]).all()
+
+
+def test_save_over_loaded(tmp_path):
+    WriteprintsIndex(metric="delta").add(references, list(range(50))).save(tmp_path)
+    loaded = WriteprintsIndex.load(tmp_path)
+    assert isinstance(loaded.vectors_, np.memmap)
+    loaded.save(tmp_path)
+    reloaded = WriteprintsIndex.load(tmp_path)
+    assert np.array_equal(reloaded.vectors_, references)
+    _, indices = reloaded.query(queries, k=3)
+    assert (indices == np.argsort(brute_force("delta"), axis=1)[:, :3]).all()
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_unknown_metric():
+    index = WriteprintsIndex().add(references, list(range(50)))
+    with pytest.raises(ValueError):
+        index.query(queries, metric="euclidean")
+
+
+def test_add_rejects_non_finite():
+    vectors = references[:20].copy()
+    vectors[7] = np.nan
+    index = WriteprintsIndex(metric="delta")
+    with pytest.raises(ValueError, match=r"rows \[7\]"):
+        index.add(vectors, list(range(20)))
+    # nothing was added, the moments are intact
+    assert len(index) == 0
+    index.add(references, list(range(50)))
+    _, indices = index.query(queries, k=3)
+    assert (indices == np.argsort(brute_force("delta"), axis=1)[:, :3]).all()
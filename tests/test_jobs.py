@@ -0,0 +1,97 @@
+import os
+from joblib import Parallel, delayed
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.jobs import (
+    ExtractionJob,
+    _lock,
+    _unlock,
+    config_hash,
+    config_params,
+)
+from writeprints_static.models import script_language
+import pytest
+
+texts = ["This is a text.", "This is another text.", "A third one!", "And 4."] * 2
+
+
+def test_run(tmp_path):
+    vec = WriteprintsStatic()
+    job = ExtractionJob(vec, tmp_path, chunk_size=3).run(texts)
+    assert job.done()
+    assert len(job.manifest["chunks"]) == 3
+    assert (job.result() != vec.transform(texts)).nnz == 0
+
+
+def test_resume(tmp_path):
+    vec = WriteprintsStatic()
+    job = ExtractionJob(vec, tmp_path, chunk_size=3).run(texts)
+    finished = os.path.join(tmp_path, "chunk-00000.npz")
+    mtime = os.path.getmtime(finished)
+    os.remove(os.path.join(tmp_path, "chunk-00001.npz"))
+    # a lock left by a dead worker
+    with open(os.path.join(tmp_path, "chunk-00001.lock"), "w") as f:
+        f.write("999999999")
+    job = ExtractionJob(vec, tmp_path).run(texts)
+    assert job.done()
+    assert os.path.getmtime(finished) == mtime
+    assert not os.path.exists(os.path.join(tmp_path, "chunk-00001.lock"))
+    assert (job.result() != vec.transform(texts)).nnz == 0
+
+
+def test_skip(tmp_path):
+    vec = WriteprintsStatic(errors="skip")
+    invalid = ["This is a text.", "", "A third one!", "And 4."]
+    job = ExtractionJob(vec, tmp_path, chunk_size=3).run(invalid)
+    X = job.result()
+    assert job.valid_mask_.tolist() == [True, False, True, True]
+    assert X.shape[0] == 3
+    kept = [text for text, valid in zip(invalid, job.valid_mask_) if valid]
+    assert (X != WriteprintsStatic().transform(kept)).nnz == 0
+
+
+def test_lock_ownership(tmp_path):
+    lock_path = os.path.join(tmp_path, "chunk-00000.lock")
+    with open(lock_path, "w") as f:
+        f.write("999999999 stale")
+    token = _lock(tmp_path, 0)
+    assert token is not None
+    # a live lock is not taken
+    assert _lock(tmp_path, 0) is None
+    # another worker took the lock over: it is not removed
+    with open(lock_path, "w") as f:
+        f.write(f"{os.getpid()} other")
+    _unlock(tmp_path, 0, token)
+    assert os.path.exists(lock_path)
+    _unlock(tmp_path, 0, f"{os.getpid()} other")
+    assert not os.path.exists(lock_path)
+    # no lock at all is not an error
+    _unlock(tmp_path, 0, token)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_workers(tmp_path):
+    vec = WriteprintsStatic()
+    job = ExtractionJob(vec, tmp_path, chunk_size=2).run(texts, n_workers=2)
+    assert (job.result() != vec.transform(texts)).nnz == 0
+
+
+def test_mismatch(tmp_path):
+    ExtractionJob(WriteprintsStatic(), tmp_path, chunk_size=3).run(texts)
+    with pytest.raises(ValueError):
+        ExtractionJob(WriteprintsStatic(), tmp_path).run(texts[::-1])
+    with pytest.raises(ValueError):
+        ExtractionJob(WriteprintsStatic(model="other"), tmp_path).run(texts)
+
+
+def test_config_hash():
+    assert config_hash(WriteprintsStatic()) == config_hash(WriteprintsStatic(n_jobs=2))
+    assert config_hash(WriteprintsStatic()) != config_hash(
+        WriteprintsStatic(model="other")
+    )
+
+
+def test_config_hash_across_processes():
+    vec = WriteprintsStatic(router=script_language)
+    hashes = Parallel(n_jobs=2)(delayed(config_hash)(vec) for _ in range(2))
+    assert hashes == [config_hash(vec)] * 2
+    assert config_params(vec)["router"] == "writeprints_static.models.script_language"
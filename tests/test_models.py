@@ -0,0 +1,57 @@
+from pathlib import Path
+import spacy
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.models import ModelPool, route, script_language
+import pytest
+
+
+@pytest.fixture
+def pipelines(tmp_path):
+    paths = {}
+    for language in ("en", "zh", "fr"):
+        paths[language] = str(tmp_path / language)
+        spacy.blank(language).to_disk(paths[language])
+    return paths
+
+
+def test_pool(pipelines):
+    pool = ModelPool(max_models=2)
+    en = pool.get(pipelines["en"])
+    pool.get(pipelines["zh"])
+    assert pool.get(pipelines["en"]) is en
+    pool.get(pipelines["fr"])
+    assert len(pool) == 2
+    assert pipelines["zh"] not in pool
+    assert pipelines["en"] in pool
+    assert pool.loads == 3
+
+
+def test_script_language():
+    assert script_language("This is a text.") == "en"
+    assert script_language("这是一个文本。") == "zh"
+
+
+def test_route():
+    raws = ["This is a text.", "这是一个文本。", "Another text."]
+    assert route("m", None, raws) == {"m": [0, 1, 2]}
+    assert route({"en": "a", "zh": "b"}, None, raws) == {"a": [0, 2], "b": [1]}
+    with pytest.raises(ValueError):
+        route({"en": "a"}, None, raws)
+    assert route(Path("m"), None, raws) == {Path("m"): [0, 1, 2]}
+
+
+def test_transform_routes(pipelines):
+    raws = ["This is a text.", "这是一个文本。", "Another text here."]
+    vec = WriteprintsStatic(model={"en": pipelines["en"], "zh": pipelines["zh"]})
+    X = vec.transform(raws)
+    expected = WriteprintsStatic(model=pipelines["en"]).transform(raws[::2])
+    assert (X[[0, 2]] != expected).nnz == 0
+    assert (
+        X[1] != WriteprintsStatic(model=pipelines["zh"]).transform(raws[1:2])
+    ).nnz == 0
+
+
+def test_transform_path(pipelines):
+    raws = ["This is a text.", "Another text here."]
+    X = WriteprintsStatic(model=Path(pipelines["en"])).transform(raws)
+    assert (X != WriteprintsStatic(model=pipelines["en"]).transform(raws)).nnz == 0
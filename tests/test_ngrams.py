@@ -0,0 +1,48 @@
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.ngrams import NgramVocabulary
+from writeprints_static.tokens import TokenTable
+import pytest
+
+
+def test_from_ngrams():
+    vocabulary = NgramVocabulary.from_ngrams(["th", "he", "ée"])
+    word_tokens = TokenTable.from_lists([["the", "thé", "théée"], []])
+    X = vocabulary.transform(word_tokens)
+    assert vocabulary.ngrams_ == ["th", "he", "ée"]
+    assert X.tolist() == [[3, 1, 1], [0, 0, 0]]
+
+
+def test_fit():
+    texts = ["The other then, these three.", "Thus there."] * 3
+    vocabulary = NgramVocabulary(3, size=2, chunk_size=4).fit(iter(texts))
+    assert vocabulary.ngrams_ == ["the", "her"]
+
+
+def test_fit_letters_only():
+    texts = ["In 2001, 1999 and 2010 the_the 100 000 009 then."] * 3
+    vocabulary = NgramVocabulary(2, size=3).fit(texts)
+    assert sorted(vocabulary.ngrams_[:2]) == ["he", "th"]
+    assert not any(
+        char.isdigit() or char == "_" for ngram in vocabulary.ngrams_ for char in ngram
+    )
+
+
+def test_fit_bounded():
+    texts = ["ab ab ab ab ac ad ae af ag"] * 10
+    vocabulary = NgramVocabulary(2, size=1, capacity=3, chunk_size=1).fit(texts)
+    assert vocabulary.ngrams_ == ["ab"]
+    assert len(vocabulary._keys) <= 3
+
+
+def test_n_out_of_range():
+    with pytest.raises(ValueError):
+        NgramVocabulary(4)
+
+
+def test_empty_vocabulary():
+    vocabulary = NgramVocabulary(2, size=5).fit(["12 34 56.", "a 1 b 2."])
+    assert vocabulary.ngrams_ == []
+    X = vocabulary.transform(TokenTable.from_lists([["hello", "there"], []]))
+    assert X.shape == (2, 0)
+    vec = WriteprintsStatic(n_ngrams=5).fit(["12 34 56.", "a 1 b 2."])
+    assert vec.transform(["hello there."]).shape == (1, len(vec.get_feature_names()))
@@ -0,0 +1,77 @@
+import numpy as np
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.normalization import WriteprintsNormalizer
+
+corpus = [
+    "This is the first document.",
+    "This document is the second document.",
+    "And this is the third one.",
+    "Is this the first document?",
+    "I've seen this 1 before, haven't I?",
+]
+
+
+def test_partial_fit():
+    vec = WriteprintsStatic(batch_size=2)
+    norm = WriteprintsNormalizer(vec, rate="words").fit(corpus)
+    X = WriteprintsStatic().transform(corpus).toarray()
+    rates = WriteprintsNormalizer(vec, rate="words", standardize=False)
+    rates.partial_fit(X[:1])
+    R = rates.transform(X).toarray()
+    assert np.allclose(norm.mean_, R.mean(axis=0))
+    assert np.allclose(norm.var_, R.var(axis=0))
+    assert (norm.n_samples_seen_ == 5).all()
+
+
+def test_rates():
+    vec = WriteprintsStatic()
+    X = vec.transform(corpus)
+    norm = WriteprintsNormalizer(vec, rate="words", standardize=False).fit(corpus)
+    Y = norm.transform(X).toarray()
+    total_words = vec.feature_names_.index("total_words")
+    letter_t = vec.feature_names_.index("letter_t")
+    digits_ratio = vec.feature_names_.index("digits_ratio")
+    assert Y[0, total_words] == X[0, total_words]
+    assert Y[0, letter_t] == X[0, letter_t] / X[0, total_words]
+    assert Y[4, digits_ratio] == X[4, digits_ratio]
+
+
+def test_standardize_in_place():
+    vec = WriteprintsStatic()
+    X = vec.transform(corpus)
+    norm = WriteprintsNormalizer(vec, rate=None, tfidf=True).fit(corpus)
+    X = X.astype(np.float64)
+    Y = norm.transform(X, copy=False)
+    assert np.shares_memory(Y.data, X.data)
+    dense = Y.toarray()
+    varying = vec.transform(corpus).toarray().std(axis=0) > 0
+    weighted = np.array(
+        [
+            name.startswith(("function_word_", "bigram_", "trigram_"))
+            for name in vec.feature_names_
+        ]
+    )
+    function_word_this = vec.feature_names_.index("function_word_this")
+    assert np.allclose(dense.std(axis=0)[varying & ~weighted], 1)
+    assert np.allclose(np.linalg.norm(dense[:, weighted], axis=1), 1)
+    assert norm.idf_[function_word_this] == 1
+
+
+def test_tfidf_after_standardize():
+    vec = WriteprintsStatic()
+    X = vec.transform(corpus)
+    standardized = WriteprintsNormalizer(vec).fit(corpus).transform(X).toarray()
+    tfidf = WriteprintsNormalizer(vec, tfidf=True).fit(corpus).transform(X).toarray()
+    weighted = np.array(
+        [
+            name.startswith(("function_word_", "bigram_", "trigram_"))
+            for name in vec.feature_names_
+        ]
+    )
+    assert not np.allclose(standardized[:, weighted], tfidf[:, weighted])
+    assert np.allclose(standardized[:, ~weighted], tfidf[:, ~weighted])
+    # the weighted columns of every row are the standardized ones weighted by idf, up to the row norm
+    norm = WriteprintsNormalizer(vec, tfidf=True).fit(corpus)
+    expected = standardized[:, weighted] * norm.idf_[weighted]
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    assert np.allclose(tfidf[:, weighted], expected)
@@ -0,0 +1,60 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.spatial.distance import cdist
+from writeprints_static.pairwise import pairwise_threshold, pairwise_top_k
+import pytest
+
+rng = np.random.default_rng(0)
+X = rng.gamma(2.0, size=(40, 12)).astype(np.float32)
+Y = rng.gamma(2.0, size=(25, 12)).astype(np.float32)
+# small enough to force several bands and tiles
+budget = 20000
+
+
+def test_top_k():
+    distances, indices = pairwise_top_k(
+        csr_matrix(X), Y, k=3, metric="manhattan", memory_budget=budget, n_jobs=2
+    )
+    expected = cdist(X, Y, "cityblock")
+    assert (indices == np.argsort(expected, axis=1)[:, :3]).all()
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :3], atol=1e-4)
+
+
+def test_top_k_symmetric(tmp_path):
+    distances, indices = pairwise_top_k(
+        X, k=2, metric="cosine", memory_budget=budget, path=tmp_path / "knn"
+    )
+    expected = cdist(X, X, "cosine")
+    np.fill_diagonal(expected, np.inf)
+    assert isinstance(indices, np.memmap)
+    assert (indices == np.argsort(expected, axis=1)[:, :2]).all()
+    assert np.allclose(distances, np.sort(expected, axis=1)[:, :2], atol=1e-5)
+
+
+@pytest.mark.parametrize("path", [None, "edges.bin"])
+def test_threshold_symmetric(tmp_path, path):
+    expected = 1 - cdist(
+        X, X, lambda u, v: np.minimum(u, v).sum() / np.maximum(u, v).sum()
+    )
+    threshold = np.quantile(expected[np.triu_indices(len(X), k=1)], 0.1)
+    edges = pairwise_threshold(
+        X,
+        threshold=threshold,
+        metric="minmax",
+        memory_budget=budget,
+        n_jobs=2,
+        path=None if path is None else tmp_path / path,
+    )
+    rows, cols = np.nonzero(np.triu(expected <= threshold, k=1))
+    assert len(edges) > 0
+    assert edges["row"].tolist() == rows.tolist()
+    assert edges["col"].tolist() == cols.tolist()
+    assert np.allclose(edges["distance"], expected[rows, cols], atol=1e-5)
+
+
+def test_delta_threshold():
+    edges = pairwise_threshold(X, Y, threshold=0.7, metric="delta")
+    stacked = np.vstack([X, Y])
+    mean, std = stacked.mean(axis=0), stacked.std(axis=0)
+    expected = cdist((X - mean) / std, (Y - mean) / std, "cityblock") / 12
+    assert len(edges) == (expected <= 0.7).sum()
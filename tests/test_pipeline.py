@@ -0,0 +1,66 @@
+from scipy.sparse import vstack
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.export import read_csr
+from writeprints_static.pipeline import STAGES, Pipeline
+import numpy as np
+import pytest
+
+texts = ["This is a text.", "This is another text.", "A third one!", "And 4."] * 5
+
+
+@pytest.mark.parametrize("n_parsers,n_extractors", [(1, 1), (2, 3)])
+def test_pipeline_transform(n_parsers, n_extractors):
+    vec = WriteprintsStatic(batch_size=3)
+    pipeline = Pipeline(vec, n_parsers, n_extractors, queue_size=1)
+    # any iterable, e.g. a generator
+    X = pipeline.transform(text for text in texts)
+    assert (X != vec.transform(texts)).nnz == 0
+    assert pipeline.valid_mask_.all() and len(pipeline.valid_mask_) == len(texts)
+
+    stats = pipeline.stats()
+    assert list(stats) == list(STAGES)
+    assert all(stats[stage]["batches"] == 7 for stage in STAGES)
+    assert stats["parse"]["workers"] == n_parsers
+    assert all(0 <= stats[stage]["utilization"] <= 1 for stage in STAGES)
+    assert all(stats[stage]["max_queue_depth"] <= 1 for stage in ("parse", "extract"))
+    assert pipeline.report().splitlines()[2].startswith("parse")
+
+
+def test_pipeline_bounds_batches_in_flight():
+    read = []
+
+    def documents():
+        for text in texts:
+            read.append(text)
+            yield text
+
+    vec = WriteprintsStatic(batch_size=2)
+    batches = Pipeline(vec, max_in_flight=2).iter_transform(documents())
+    next(batches)
+    # the read stage waits for a free slot
+    assert len(read) <= 2 * 3 + 1
+    assert vstack([vec.transform(texts[:2])] + list(batches)).shape[0] == len(texts)
+
+
+def test_pipeline_errors(tmp_path):
+    invalid = ["This is a text.", "   ", "!!!", "And 4."]
+    with pytest.raises(ValueError, match="position 1"):
+        Pipeline(WriteprintsStatic()).transform(invalid)
+    with pytest.raises(ValueError, match="without word tokens"):
+        Pipeline(WriteprintsStatic()).transform(invalid[2:])
+
+    pipeline = Pipeline(WriteprintsStatic(errors="skip", batch_size=3))
+    X = pipeline.transform(iter(invalid))
+    assert pipeline.valid_mask_.tolist() == [True, False, False, True]
+    assert X.shape[0] == 2
+
+    # a batch of invalid documents only
+    pipeline = Pipeline(WriteprintsStatic(errors="skip", batch_size=2))
+    assert pipeline.transform(invalid[:2] + ["", "  "]).shape[0] == 1
+
+    vec = WriteprintsStatic(errors="fill", fill_value=-1)
+    n_rows = Pipeline(vec).export(invalid, tmp_path / "rows")
+    X, _ = read_csr(tmp_path / "rows")
+    assert n_rows == 4
+    assert np.all(X.toarray()[1] == -1)
+    assert (X[[0, 3]] != vec.transform(invalid)[[0, 3]]).nnz == 0
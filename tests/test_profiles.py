@@ -0,0 +1,75 @@
+import numpy as np
+from scipy.sparse import csr_matrix
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.profiles import AuthorProfiles
+import pytest
+
+rng = np.random.default_rng(0)
+X = rng.gamma(2.0, size=(30, 8))
+authors = ["ann", "bob", "cy"] * 10
+
+
+def test_update():
+    profiles = AuthorProfiles()
+    profiles.update(csr_matrix(X[:7]), authors[:7])
+    profiles.update(X[7:20], authors[7:20])
+    profiles.update(X[20:], authors[20:])
+    assert profiles.authors_ == ["ann", "bob", "cy"]
+    for position, author in enumerate(profiles.authors_):
+        rows = X[[a == author for a in authors]]
+        assert profiles.counts_[position] == 10
+        assert np.allclose(profiles.means_[position], rows.mean(axis=0))
+        assert np.allclose(profiles.variances_[position], rows.var(axis=0))
+
+
+def test_score():
+    profiles = AuthorProfiles().update(X, authors)
+    distances = profiles.score(X[:4], metric="manhattan")
+    assert distances.shape == (4, 3)
+    assert np.allclose(distances[1, 2], np.abs(X[1] - X[2::3].mean(axis=0)).sum())
+    std = X.std(axis=0)
+    delta = profiles.score(X[:1])
+    expected = np.abs((X[0] - X[::3].mean(axis=0)) / std).mean()
+    assert np.isclose(delta[0, 0], expected)
+
+
+def test_save_load(tmp_path):
+    profiles = AuthorProfiles().update(X, authors)
+    profiles.save(tmp_path / "profiles.npz")
+    loaded = AuthorProfiles.load(tmp_path / "profiles.npz")
+    loaded.update(X[:3], ["ann", "bob", "dee"])
+    assert loaded.authors_ == ["ann", "bob", "cy", "dee"]
+    assert loaded.counts_.tolist() == [11, 11, 10, 1]
+    assert np.allclose(loaded.means_[3], X[2])
+
+
+def test_update_texts_skips_invalid():
+    texts = ["This is a text.", "", "This is another text.", "!!!"]
+    for errors in ("skip", "fill"):
+        vectorizer = WriteprintsStatic(errors=errors, batch_size=2)
+        profiles = AuthorProfiles(vectorizer).update_texts(texts, ["a", "b", "a", "c"])
+        assert profiles.authors_ == ["a"]
+        assert profiles.counts_.tolist() == [2]
+        assert not np.isnan(profiles.means_).any()
+
+
+def test_update_new_authors_one_at_a_time():
+    profiles = AuthorProfiles()
+    for i, row in enumerate(X):
+        profiles.update(row[None, :], [f"author-{i}"])
+    assert len(profiles) == 30
+    # capacity grows geometrically rather than by one profile per update
+    assert len(profiles._counts) == 32
+    assert profiles.means_.shape == X.shape
+    assert np.allclose(profiles.means_, X)
+    assert (profiles.counts_ == 1).all()
+
+
+def test_update_rejects_non_finite():
+    profiles = AuthorProfiles().update(X[:3], authors[:3])
+    rows = X[3:6].copy()
+    rows[1, 0] = np.nan
+    with pytest.raises(ValueError, match=r"rows \[1\]"):
+        profiles.update(rows, ["ann", "bob", "dee"])
+    assert profiles.authors_ == ["ann", "bob", "cy"]
+    assert np.allclose(profiles.means_, X[:3])
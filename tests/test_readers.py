@@ -0,0 +1,78 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import tarfile
+from scipy.sparse import vstack
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.readers import prefetch, read_jsonl, read_tar, stream_transform
+import pytest
+
+texts = ["This is a text.", "This is another text.", "A third one!", "And 4."] * 3
+lines = "".join(
+    json.dumps({"id": f"doc-{i}", "text": text}) + "\n" for i, text in enumerate(texts)
+)
+
+
+@pytest.mark.parametrize(
+    "opener", [open, gzip.open, bz2.open, lzma.open], ids=["plain", "gz", "bz2", "xz"]
+)
+def test_read_jsonl(tmp_path, opener):
+    # the compression is told from the content, not from the name
+    path = tmp_path / "corpus.jsonl"
+    with opener(path, "wt", encoding="utf-8") as f:
+        f.write(lines + "\n")
+    assert list(read_jsonl(path)) == texts
+    assert list(read_jsonl(path, id_key="id"))[1] == ("doc-1", texts[1])
+
+
+@pytest.mark.parametrize("mode", ["w", "w:gz", "w:bz2", "w:xz"])
+def test_read_tar(tmp_path, mode):
+    path = tmp_path / "corpus.tar"
+    with tarfile.open(path, mode) as tar:
+        for i, text in enumerate(texts[:4] + ["ignored"]):
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(f"docs/{i}.{'txt' if i < 4 else 'json'}")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    assert list(read_tar(path)) == texts[:4]
+    assert list(read_tar(path, names=True))[1] == ("docs/1.txt", texts[1])
+    assert len(list(read_tar(path, suffixes=None))) == 5
+
+
+def test_prefetch():
+    assert list(prefetch(range(100), buffer_size=3)) == list(range(100))
+
+    def failing():
+        yield 1
+        raise OSError("truncated archive")
+
+    with pytest.raises(OSError, match="truncated"):
+        list(prefetch(failing()))
+    # the consumer may stop early
+    items = prefetch(range(100), buffer_size=2)
+    assert next(items) == 0
+    items.close()
+
+
+def test_stream_transform(tmp_path):
+    path = tmp_path / "corpus.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        f.write(lines)
+    vec = WriteprintsStatic(batch_size=2)
+    X = vstack(list(stream_transform(vec, read_jsonl(path), chunk_size=5)))
+    assert (X != vec.transform(texts)).nnz == 0
+
+
+def test_stream_transform_tar(tmp_path):
+    path = tmp_path / "corpus.tar.xz"
+    with tarfile.open(path, "w:xz") as tar:
+        for i, text in enumerate(texts):
+            data = text.encode("utf-8")
+            info = tarfile.TarInfo(f"{i:03d}.txt")
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+    vec = WriteprintsStatic(batch_size=2)
+    X = vstack(list(stream_transform(vec, read_tar(path), chunk_size=5)))
+    assert (X != vec.transform(texts)).nnz == 0
@@ -0,0 +1,39 @@
+import numpy as np
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.revision import RevisionStore
+import pytest
+
+draft = "This is a text.\n\nIt has 3 paragraphs, OK?\n\n  The last one is here."
+revision = "This is a text.\n\nThe last one is here.\n\nA new one; with 42 digits!\n\nThis is a text."
+
+
+def same(X, Y, names):
+    # tags may differ across paragraph boundaries
+    columns = [i for i, name in enumerate(names) if not name.startswith("pos_")]
+    return np.allclose(X.toarray()[:, columns], Y.toarray()[:, columns], equal_nan=True)
+
+
+def test_update():
+    vec = WriteprintsStatic()
+    names = vec.get_feature_names()
+    store = RevisionStore(vec)
+    X = store.update("doc", draft)
+    assert store.n_parsed_ == 3
+    assert same(X, vec.transform([draft]), names)
+    X = store.update("doc", revision)
+    assert store.n_parsed_ == 2
+    assert same(X, vec.transform([revision]), names)
+    X = store.update("doc", draft)
+    assert store.n_parsed_ == 2
+    assert same(X, vec.transform([draft]), names)
+
+
+def test_documents():
+    store = RevisionStore(WriteprintsStatic())
+    store.update("a", draft)
+    store.update("b", revision)
+    assert len(store) == 2
+    store.remove("a")
+    assert "a" not in store
+    with pytest.raises(ValueError):
+        store.update("c", None)
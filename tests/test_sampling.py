@@ -0,0 +1,90 @@
+import time
+import numpy as np
+from writeprints_static import models
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.sampling import approximate
+
+rng = np.random.default_rng(0)
+words = [
+    "the",
+    "cat",
+    "sat",
+    "on",
+    "a",
+    "mat",
+    "and",
+    "then",
+    "it",
+    "ran",
+    "42",
+    "Away",
+]
+book = "\n\n".join(
+    " ".join(rng.choice(words, rng.integers(10, 50))) + "." for _ in range(400)
+)
+
+
+def test_short_document_is_exact():
+    vec = WriteprintsStatic()
+    values, errors, fraction = approximate(vec, "This is a text.")
+    assert fraction == 1.0
+    assert not errors.any()
+    assert np.allclose(values, vec.transform(["This is a text."]).toarray().ravel())
+
+
+def test_approximate():
+    vec = WriteprintsStatic()
+    names = vec.get_feature_names()
+    exact = vec.transform([book]).toarray().ravel()
+    values, errors, fraction = approximate(vec, book, fraction=0.25, random_state=0)
+    assert 0.2 < fraction < 0.3
+    assert values.shape == errors.shape == exact.shape
+    assert values[names.index("total_chars")] == exact[names.index("total_chars")]
+    for name in ("total_words", "letter_a", "avg_word_length", "digits_ratio"):
+        column = names.index(name)
+        assert errors[column] > 0
+        assert abs(values[column] - exact[column]) < 4 * errors[column]
+    assert np.isfinite(errors).all()
+
+
+def test_deadline():
+    vec = WriteprintsStatic()
+    _, _, fraction = approximate(vec, book, deadline=0.0, random_state=0)
+    assert fraction < 1
+    _, errors, fraction = approximate(vec, book, deadline=1e6)
+    assert fraction == 1.0
+    assert not errors.any()
+
+
+def test_deadline_cold_start(monkeypatch):
+    load = models.spacy.load
+
+    def slow_load(name):
+        time.sleep(1.0)
+        return load(name)
+
+    monkeypatch.setattr(models.spacy, "load", slow_load)
+    monkeypatch.setattr(models, "POOL", models.ModelPool())
+    _, _, fraction = approximate(
+        WriteprintsStatic(), book, deadline=0.5, random_state=0
+    )
+    # loading the pipeline does not leave the sample at two paragraphs per stratum
+    assert fraction > 20 / 400
+
+
+def test_tokenless_paragraphs_counted():
+    # scene breaks have no word token but count towards character features
+    scenes = book.split("\n\n")
+    broken = "\n\n".join(
+        part
+        for i, paragraph in enumerate(scenes)
+        for part in [paragraph, "* * *"][: 1 + (i % 2)]
+    )
+    vec = WriteprintsStatic(n_jobs=2)
+    names = vec.get_feature_names()
+    exact = vec.transform([broken]).toarray().ravel()
+    values, errors, _ = approximate(vec, broken, fraction=0.25, random_state=0)
+    column = names.index("special_char_asterisk")
+    assert exact[column] == 3 * 200
+    assert abs(values[column] - exact[column]) < 4 * errors[column] + 1e-9
+    assert values[column] > 0.8 * exact[column]
@@ -0,0 +1,31 @@
+from writeprints_static import scheduling
+from writeprints_static.scheduling import BatchScheduler
+
+
+def test_schedule():
+    lengths = [5, 400, 8, 40, 4000, 12, 7]
+    scheduler = BatchScheduler(
+        scheduling.rss() + 1024 * 200, max_batch_size=3, window=4, bytes_per_token=1024
+    )
+    batches = list(scheduler.schedule(lengths))
+    windows = [[], []]
+    window = 0
+    for positions, last in batches:
+        assert len(positions) <= 3
+        assert len(positions) == 1 or sum(lengths[p] for p in positions) / 4 <= 200
+        windows[window].extend(positions.tolist())
+        window += last
+    assert sorted(windows[0]) == [0, 1, 2, 3]
+    assert sorted(windows[1]) == [4, 5, 6]
+    # sorted by length within a window
+    assert windows[0] == [0, 2, 3, 1]
+
+
+def test_schedule_over_budget():
+    scheduler = BatchScheduler(0)
+    batches = list(scheduler.schedule([10, 10, 10]))
+    assert [positions.tolist() for positions, _ in batches] == [[0], [1], [2]]
+
+
+def test_rss():
+    assert scheduling.rss() > 0
@@ -0,0 +1,55 @@
+import json
+from joblib import Parallel, delayed
+from writeprints_static.base import WriteprintsStatic
+from writeprints_static.export import read_csr
+from writeprints_static.sharding import extract_shard, merge_shards
+import pytest
+
+texts = ["This is a text.", "This is another text.", "A third one!", "And 4."] * 3
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    path = tmp_path / "corpus.jsonl"
+    with open(path, "w") as f:
+        for i, text in enumerate(texts):
+            f.write(json.dumps({"id": f"doc-{i}", "text": text}) + "\n")
+    return path
+
+
+def test_extract_and_merge(tmp_path, corpus):
+    vec = WriteprintsStatic()
+    paths = [tmp_path / f"shard-{k}" for k in range(3)]
+    # processes acting as nodes
+    Parallel(n_jobs=3)(
+        delayed(extract_shard)(vec, corpus, k, 3, paths[k], chunk_size=2)
+        for k in range(3)
+    )
+    X, row_ids = merge_shards(paths[::-1], chunk_size=3)
+    assert row_ids == [f"doc-{i}" for i in range(len(texts))]
+    assert (X != vec.transform(texts)).nnz == 0
+
+    n_rows, _ = merge_shards(paths, tmp_path / "merged")
+    merged, names = read_csr(tmp_path / "merged")
+    assert n_rows == len(texts)
+    assert names == vec.get_feature_names()
+    assert (merged != X).nnz == 0
+
+
+def test_merge_validates(tmp_path, corpus):
+    paths = [tmp_path / f"shard-{k}" for k in range(2)]
+    extract_shard(WriteprintsStatic(), corpus, 0, 2, paths[0])
+    with pytest.raises(ValueError):
+        merge_shards(paths[:1])
+    extract_shard(WriteprintsStatic(errors="fill"), corpus, 1, 2, paths[1])
+    with pytest.raises(ValueError):
+        merge_shards(paths)
+
+
+def test_skip(tmp_path, corpus):
+    with open(corpus, "a") as f:
+        f.write(json.dumps({"id": "empty", "text": ""}) + "\n")
+    vec = WriteprintsStatic(errors="skip")
+    meta = extract_shard(vec, corpus, 1, 2, tmp_path / "shard")
+    assert meta["stop"] - meta["start"] == 7
+    assert meta["n_rows"] == 6
@@ -0,0 +1,26 @@
+from writeprints_static.tokens import TokenTable
+
+
+def test_from_lists():
+    table = TokenTable.from_lists([["this", "is", "a", "text"], [], ["a", "text"]])
+    assert len(table) == 3
+    assert table.vocab == ["this", "is", "a", "text"]
+    assert table.ids.tolist() == [0, 1, 2, 3, 2, 3]
+    assert table.offsets.tolist() == [0, 4, 4, 6]
+    assert table.lengths().tolist() == [4, 0, 2]
+
+
+def test_counts():
+    table = TokenTable.from_lists([["b", "a", "b"], ["a"]])
+    counts = table.counts()
+    assert counts.toarray().tolist() == [[2, 1], [0, 1]]
+    # counting must not reorder the stored tokens
+    assert table.to_lists() == [["b", "a", "b"], ["a"]]
+
+
+def test_concatenate():
+    first = TokenTable.from_lists([["a", "b"]])
+    second = TokenTable.from_lists([["c", "a"], ["b"]])
+    table = TokenTable.concatenate([first, second])
+    assert table.vocab == ["a", "b", "c"]
+    assert table.to_lists() == [["a", "b"], ["c", "a"], ["b"]]
@@ -47,6 +47,8 @@ Python 3.8+ is required. The following packages are required
 - en_core_web_sm 2.3.1
 - scipy 1.5.2+
 - numpy 1.18.5+
+- scikit-learn 0.23+
+- joblib 1.3+
 
 Important links:
 - Documentation: https://github.com/literary-materials/writeprints-static
@@ -97,34 +99,149 @@ Reference:
 
 import re
 import warnings
-import en_core_web_sm
+from functools import lru_cache
 import numpy as np
-from scipy.sparse import csr_matrix
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.sparse import csr_matrix, vstack
+from sklearn.base import BaseEstimator, TransformerMixin
+from sklearn.utils.validation import check_is_fitted
 from writeprints_static import lexical_features as lex
+from writeprints_static import models
 from writeprints_static import syntactic_features as syn
+from writeprints_static.ngrams import NgramVocabulary
+from writeprints_static.scheduling import BatchScheduler
+from writeprints_static.tokens import TokenTable
 
+# intermediates which can be kept on the instance after transform for debugging
+RETAINABLE = ("raws", "docs", "tags", "word_tokens")
+# policies for invalid documents
+ERRORS = ("raise", "skip", "fill")
 
-class WriteprintsStatic(object):
+
+class WriteprintsStatic(BaseEstimator, TransformerMixin):
     """WriteprintsStatic
 
     The main class does the heavy lifting.
 
+    WriteprintsStatic is a scikit-learn transformer: the constructor only stores its parameters, fit does not look at
+    the data unless `n_ngrams` asks for corpus-specific character n-grams, and the spaCy pipeline is referred to by
+    name. Pipelines are loaded lazily into a bounded pool per process and never stored on the instance, so cloning and
+    pickling are cheap and joblib workers load their own copy, see models.ModelPool. For mixed-language corpora, give
+    a dict of pipelines by language: every document is routed to the pipeline of its language, documents are parsed
+    in per-language groups, and rows come back in input order.
+
+    Identical texts are parsed once: transform deduplicates the whole input and iter_transform every batch, and the
+    rows of duplicates are filled in by row indexing.
+
+    Intermediates (raw texts, spaCy docs, tags and word tokens) are built batch by batch and released as soon as the
+    rows of a batch are assembled, so nothing but the feature names is kept on the instance by default. Name the
+    intermediates you want to inspect in `retain` and they are kept for the documents of the last transform call.
+
+    Invalid documents (anything but a string, empty or whitespace-only strings, strings over 10,000,000 characters, and
+    texts without any word token) raise a ValueError by default. With errors="skip" or "fill" they are handled row by
+    row instead, so one bad document does not abort the batch: "skip" leaves their rows out, "fill" sets their rows to
+    fill_value, and valid_mask_ tells which input documents are valid.
+
     Attributes:
-        raws: A list of raw text fed by user.
-        docs: A list of spaCy's doc instances build on self.raws with en_core_web_sm.
-        tags: A list of list of POS, derived from token.pos_ in self.docs.
-        word_tokens: A list of list of word tokens, derived from token.text in self.docs.
+        retain: An iterable of intermediate names to keep after transform, any of "raws", "docs", "tags", and
+            "word_tokens". None (default) keeps nothing.
+        batch_size: Number of documents parsed and extracted at a time.
+        n_jobs: Number of processes batches are spread over, None for one, -1 for all cores.
+        model: Name or path of the spaCy pipeline, or a dict of them by language.
+        router: With a dict of pipelines, a function returning the language of a raw text. None (default) uses
+            models.script_language, which tells "zh" from "en".
+        max_models: Number of pipelines kept loaded per process at most, the least recently used being evicted.
+        deduplicate: Whether identical texts are parsed and extracted only once.
+        n_ngrams: Number of letter bigrams and of letter trigrams learned from the corpus by fit. None (default) counts
+            the fixed Brown Corpus lists instead.
+        errors: What to do with invalid documents, any of ERRORS.
+        fill_value: The value of every feature of an invalid document with errors="fill". None (default) means NaN.
+        memory_budget: Upper bound in bytes of the process memory batches are sized to, see BatchScheduler. None
+            (default) parses `batch_size` documents at a time.
+        raws: A list of raw text fed by user, if retained. Only valid documents are kept. With deduplicate, only the
+            first occurrence of a text and its intermediates are kept. With memory_budget, intermediates are kept in
+            parsing order rather than input order.
+        docs: A list of spaCy's doc instances build on raws with the pipeline, if retained.
+        tags: A TokenTable of POS, derived from token.pos_ in docs, if retained.
+        word_tokens: A TokenTable of word tokens, derived from token.text in docs, if retained.
         feature_names_: A list of feature names.
+        bigrams_: The NgramVocabulary of bigrams learned by fit, if n_ngrams is set.
+        trigrams_: The NgramVocabulary of trigrams learned by fit, if n_ngrams is set.
+        valid_mask_: A boolean array, whether each document of the last transform call is valid. iter_transform
+            extends it batch by batch.
     """
 
-    def __init__(self):
-        """Initiates WriteprintsStatic."""
-        self.docs = None
-        self.raws = None
-        self.tags = None
-        self.word_tokens = None
-        self.feature_names_ = None
-        self._nlp_max_length = None
+    def __init__(
+        self,
+        retain=None,
+        batch_size=1000,
+        n_jobs=None,
+        model="en_core_web_sm",
+        deduplicate=True,
+        n_ngrams=None,
+        errors="raise",
+        fill_value=None,
+        memory_budget=None,
+        router=None,
+        max_models=models.MAX_MODELS,
+    ):
+        """Initiates WriteprintsStatic.
+
+        Args:
+            retain: An iterable of intermediate names to keep after transform, see RETAINABLE.
+            batch_size: Number of documents parsed and extracted at a time, the largest batch with memory_budget.
+            n_jobs: Number of processes batches are spread over, None for one, -1 for all cores.
+            model: Name or path of the spaCy pipeline, or a dict of them by language.
+            deduplicate: Whether identical texts are parsed and extracted only once.
+            n_ngrams: Number of letter bigrams and of letter trigrams learned by fit, None for the Brown Corpus lists.
+            errors: "raise" (default) to raise on invalid documents, "skip" to leave their rows out, or "fill" to set
+                their rows to fill_value.
+            fill_value: The value of every feature of an invalid document with errors="fill", None for NaN.
+            memory_budget: Upper bound in bytes of the process memory batches are sized to, None for fixed batches.
+            router: A function returning the language of a raw text, None for models.script_language.
+            max_models: Number of pipelines kept loaded per process at most.
+        """
+        self.retain = retain
+        self.batch_size = batch_size
+        self.n_jobs = n_jobs
+        self.model = model
+        self.deduplicate = deduplicate
+        self.n_ngrams = n_ngrams
+        self.errors = errors
+        self.fill_value = fill_value
+        self.memory_budget = memory_budget
+        self.router = router
+        self.max_models = max_models
+
+    def fit(self, input=None, y=None):
+        """Sets feature_names_, and learns the bigram and trigram vocabularies if n_ngrams is set.
+
+        The vocabularies are learned in one streaming pass, `batch_size` texts at a time, with bounded memory, see
+        NgramVocabulary. Without n_ngrams, nothing is learned from data.
+
+        Args:
+            input: An iterable of English raw texts (in string type), required if n_ngrams is set.
+
+        Returns:
+            self.
+
+        Raises:
+            ValueError: an error if n_ngrams is set and no input is given.
+        """
+        if self.n_ngrams is not None:
+            if input is None:
+                raise ValueError("""Raw texts expected to learn n-grams from.""")
+            self.bigrams_ = NgramVocabulary(2, self.n_ngrams)
+            self.trigrams_ = NgramVocabulary(3, self.n_ngrams)
+            batch = []
+            for raw in filter(_usable, input):
+                batch.append(raw)
+                if len(batch) == self.batch_size:
+                    self._fit_ngrams(batch)
+                    batch = []
+            self._fit_ngrams(batch)
+        self.feature_names_ = self.get_feature_names()
+        return self
 
     def transform(self, input):
         """
@@ -144,10 +261,105 @@ class WriteprintsStatic(object):
             ValueError: an error if the input is not a list of string or the
 
         """
+        max_length = self._validate(input)
+        input = self._screen(input)
+        if self.deduplicate:
+            unique, inverse = _unique(input)
+        else:
+            unique, inverse = input, None
+        batches = list(self._iter_batches(unique, max_length))
+        X = vstack([rows for rows, _ in batches], format="csr")
+        valid = np.concatenate([valid for _, valid in batches])
+        if inverse is not None and len(unique) < len(input):
+            X, valid = X[inverse], valid[inverse]
+        self.valid_mask_ = valid
+        return X[valid] if self.errors == "skip" else X
+
+    def iter_transform(self, input):
+        """Generates values batch by batch.
+
+        The input is validated as a whole up front, then parsed and extracted `batch_size` documents at a time,
+        spread over `n_jobs` processes. Each batch's docs, tags and word tokens are dropped once its rows are built
+        unless named in `retain`.
+
+        Args:
+            input: A list of English raw texts (in string type).
+
+        Yields:
+            A scipy.sparse.csr_matrix instance per batch, rows in input order. With errors="skip", the rows of invalid
+            documents are left out.
+
+        Raises:
+            ValueError: an error if the input is not a list of string, a string is empty or too long, or `retain`
+                names an unknown intermediate.
+        """
+        max_length = self._validate(input)
+        return self._iter_rows(self._screen(input), max_length)
+
+    def fit_transform(self, input, y=None):
+        """See self.transform."""
+        return self.fit(input).transform(input)
+
+    def get_feature_names(self):
+        """Returns Writeprints-Static feature names."""
+        return list(self.get_feature_names_out())
+
+    def get_feature_names_out(self, input_features=None):
+        """Returns Writeprints-Static feature names as a numpy array of str objects.
+
+        Args:
+            input_features: Ignored, present for scikit-learn API consistency.
+        """
+        return np.asarray(_feature_names(*self._vocabularies()), dtype=object)
+
+    def _fit_ngrams(self, batch):
+        """Merges a batch of raw texts into the bigram and trigram vocabularies."""
+        self.bigrams_.partial_fit(batch)
+        self.trigrams_.partial_fit(batch)
+
+    def _vocabularies(self):
+        """Returns the bigram and trigram vocabularies to count, None for the Brown Corpus lists."""
+        if self.n_ngrams is None:
+            return None, None
+        check_is_fitted(self, ("bigrams_", "trigrams_"))
+        return self.bigrams_, self.trigrams_
+
+    def _check_retain(self):
+        """Returns the set of intermediate names to keep, raises ValueError on unknown names."""
+        retained = set(self.retain or ())
+        unknown = retained.difference(RETAINABLE)
+        if unknown:
+            raise ValueError(
+                f"""Unknown intermediates {sorted(unknown)} in retain, expected any of {list(RETAINABLE)}."""
+            )
+        return retained
+
+    def _validate(self, input):
+        """Checks the input type and lengths, and returns the spaCy max_length accordingly.
+
+        With errors="skip" or "fill", only the input type is checked, and max_length is taken over valid documents.
+        """
+        if self.errors not in ERRORS:
+            raise ValueError(
+                f"""Unknown errors policy {self.errors!r}, expected any of {list(ERRORS)}."""
+            )
+        if self.errors != "raise":
+            if not isinstance(input, list):
+                raise ValueError(
+                    f"""List of raw text documents expected, {type(input)} object received."""
+                )
+            longest = max((len(raw) for raw in input if _usable(raw)), default=0)
+            if longest > 1000000:
+                warnings.warn(
+                    """The texts in the list are expected to be less than 100,000 characters.""",
+                    UserWarning,
+                    stacklevel=3,
+                )
+                return round(longest * 1.1)
+            return 1000000
+
         if isinstance(input, list):
-            if all(isinstance(m, str) for m in input):
-                self.raws = input
-            else:
+            if not all(isinstance(m, str) for m in input):
                 raise ValueError(
                     f"""List of raw text documents expected, {[type(m) for m in input]} object received."""
                 )
@@ -158,68 +370,319 @@ class WriteprintsStatic(object):
 
         # checks the length
         # if any raw is longer than 10,000,000, raises an error.
-        if any(1 if len(raw) > 10000000 else 0 for raw in self.raws):
+        if any(1 if len(raw) > 10000000 else 0 for raw in input):
             raise ValueError(
                 """Pass in string containing less than 1,000,000 characters.\n
                    The texts in the list are expected to be less than 100,000 characters.\n"""
             )
         # if any raw longer than 1,000,000, warns user and increases the spaCy's nlp.max_length accordingly.
-        elif any(1 if len(raw) > 1000000 else 0 for raw in self.raws):
+        elif any(1 if len(raw) > 1000000 else 0 for raw in input):
             warnings.warn(
                 """The texts in the list are expected to be less than 100,000 characters.""",
                 UserWarning,
-                stacklevel=2,
+                stacklevel=3,
             )
-            _nlp_max_length = round(len(self.raws) * 1.1)
+            return round(max(len(raw) for raw in input) * 1.1)
         # if any raw is vacant, raises an error in case of incoming ZeroDivision errors.
-        elif any(1 if len(raw) == 0 else 0 for raw in self.raws):
+        elif any(1 if len(raw) == 0 else 0 for raw in input):
             raise ValueError("""Remove zero-length string.""")
+        # whitespace-only texts have no character to take ratios over
+        elif any(1 if raw.isspace() else 0 for raw in input):
+            raise ValueError("""Remove whitespace-only string.""")
         else:
-            _nlp_max_length = 1000000
-        # loads the language model and tune the max_length
-        nlp = en_core_web_sm.load()
-        nlp.max_length = _nlp_max_length
+            return 1000000
+
+    def _screen(self, input):
+        """Replaces invalid documents with None unless errors="raise", see _usable."""
+        if self.errors == "raise":
+            return input
+        return [raw if _usable(raw) else None for raw in input]
+
+    def _iter_rows(self, input, max_length):
+        """Yields the rows of screened input batch by batch and extends valid_mask_, see iter_transform."""
+        self.valid_mask_ = np.zeros(0, dtype=bool)
+        for rows, valid in self._iter_batches(input, max_length):
+            self.valid_mask_ = np.concatenate([self.valid_mask_, valid])
+            yield rows[valid] if self.errors == "skip" else rows
+
+    def _schedule(self, input):
+        """Yields the input positions of every batch and whether it ends a window, see BatchScheduler.schedule.
+
+        Without memory_budget, batches are `batch_size` consecutive documents and every batch is a window.
+        """
+        if self.memory_budget is None:
+            for start in range(0, len(input), self.batch_size):
+                yield np.arange(start, min(start + self.batch_size, len(input))), True
+            return
+        scheduler = BatchScheduler(
+            self.memory_budget,
+            self.batch_size,
+            window=10 * self.batch_size,
+            n_workers=effective_n_jobs(self.n_jobs),
+        )
+        yield from scheduler.schedule([0 if raw is None else len(raw) for raw in input])
+
+    def _iter_batches(self, input, max_length):
+        """Yields the rows of screened input and their validity window by window, invalid rows set to fill_value."""
+        retained = self._check_retain()
+        vocabularies = self._vocabularies()
+        self.feature_names_ = self.get_feature_names()
+        for name in ("raws", "docs"):
+            setattr(self, name, [] if name in retained else None)
+        for name in ("tags", "word_tokens"):
+            setattr(self, name, TokenTable.from_lists([]) if name in retained else None)
+
+        # batches are planned lazily, as joblib dispatches them, so the plan sees the memory in use
+        plan = []
+
+        def raws():
+            for positions, last in self._schedule(input):
+                plan.append((positions, last))
+                yield [input[position] for position in positions]
+
+        batches = Parallel(n_jobs=self.n_jobs, return_as="generator")(
+            delayed(_transform_batch)(
+                self.model,
+                max_length,
+                batch,
+                retained,
+                self.deduplicate,
+                vocabularies,
+                self.errors == "raise",
+                np.nan if self.fill_value is None else self.fill_value,
+                self.router,
+                self.max_models,
+            )
+            for batch in raws()
+        )
+        window = []
+        for (rows, valid, kept), (positions, last) in zip(batches, plan):
+            for name in ("raws", "docs"):
+                if name in kept:
+                    getattr(self, name).extend(kept[name])
+            for name in ("tags", "word_tokens"):
+                if name in kept:
+                    setattr(
+                        self,
+                        name,
+                        TokenTable.concatenate([getattr(self, name), kept[name]]),
+                    )
+            window.append((positions, rows, valid))
+            if last:
+                yield _reorder(window)
+                window = []
+
+
+@lru_cache(maxsize=16)
+def _feature_names(bigrams=None, trigrams=None):
+    """Returns the feature names, taken from the labels of the extractors run on an empty batch."""
+    _, labels = _extract(
+        [], TokenTable.from_lists([]), TokenTable.from_lists([]), (bigrams, trigrams)
+    )
+    return tuple(sum(labels, []))
+
+
+def _unique(raws):
+    """Returns the distinct texts in order of first occurrence and the position of every text among them."""
+    positions = {}
+    inverse = np.array(
+        [positions.setdefault(raw, len(positions)) for raw in raws], dtype=np.int64
+    )
+    return list(positions), inverse
+
+
+def _reorder(window):
+    """Stacks the rows and validity of the batches of a window and puts them back in input order."""
+    if len(window) == 1:
+        positions, rows, valid = window[0]
+        if (np.diff(positions) > 0).all():
+            return rows, valid
+    order = np.argsort(np.concatenate([positions for positions, _, _ in window]))
+    rows = vstack([rows for _, rows, _ in window], format="csr")
+    valid = np.concatenate([valid for _, _, valid in window])
+    return rows[order], valid[order]
+
+
+def _usable(raw):
+    """Returns whether a document can be featurized at all: a non-blank string of at most 10,000,000 characters."""
+    return isinstance(raw, str) and 0 < len(raw) <= 10000000 and not raw.isspace()
+
+
+def _transform_batch(
+    model,
+    max_length,
+    raws,
+    retained,
+    deduplicate=False,
+    vocabularies=(None, None),
+    strict=True,
+    fill_value=np.nan,
+    router=None,
+    max_models=models.MAX_MODELS,
+):
+    """Parses and extracts a batch of raw texts.
+
+    This is a module-level function so that joblib workers receive only the model names and the batch; every worker
+    loads the pipelines itself. The intermediates only live in this frame, so they are freed on return unless retained.
+
+    Args:
+        model: Name or path of the spaCy pipeline, or a dict of them by language.
+        max_length: The spaCy nlp.max_length to use.
+        raws: A list of raw texts.
+        retained: A set of intermediate names to return alongside the rows.
+        deduplicate: Whether identical texts in the batch are parsed and extracted only once.
+        vocabularies: A tuple of the bigram and trigram NgramVocabulary, None for the Brown Corpus lists.
+        strict: Whether a text without word tokens raises. Otherwise it is invalid, as None entries of raws are.
+        fill_value: The value of every feature of an invalid document.
+        router: A function returning the language of a raw text, see models.route.
+        max_models: Number of pipelines kept loaded in the process at most.
+
+    Returns:
+        A tuple of a scipy.sparse.csr_matrix instance holding the rows of the batch, a boolean array of their
+        validity, and a dict of the retained intermediates.
+
+    Raises:
+        ValueError: an error if strict and a text has no word token.
+    """
+    valid, positions, raws, inverse = _prepare(raws, deduplicate)
+    docs, word_tokens, tags = _parse(model, max_length, raws, router, max_models)
+    values = _values(raws, word_tokens, tags, vocabularies)
+    kept = {
+        name: value
+        for name, value in (
+            ("raws", raws),
+            ("docs", docs),
+            ("tags", tags),
+            ("word_tokens", word_tokens),
+        )
+        if name in retained
+    }
+    rows, valid = _assemble(
+        values, raws, word_tokens, valid, positions, inverse, strict, fill_value
+    )
+    return rows, valid, kept
+
+
+def _prepare(raws, deduplicate=False):
+    """Drops the invalid (None) entries of a batch and, if deduplicate, the repeated texts.
+
+    Returns:
+        A tuple of the validity of every entry, the positions of the valid ones, the texts left to parse, and the
+        position of every valid entry among them (None if no text was dropped as a repeat).
+    """
+    valid = np.array([raw is not None for raw in raws], dtype=bool)
+    positions = np.flatnonzero(valid)
+    if len(positions) < len(raws):
+        raws = [raws[position] for position in positions]
+    inverse = None
+    if deduplicate:
+        unique, inverse = _unique(raws)
+        if len(unique) < len(raws):
+            raws = unique
+        else:
+            inverse = None
+    return valid, positions, raws, inverse
+
+
+def _assemble(values, raws, word_tokens, valid, positions, inverse, strict, fill_value):
+    """Builds the rows of a batch from the values of its valid texts, see _prepare, _values, and _transform_batch.
+
+    Returns:
+        A tuple of a scipy.sparse.csr_matrix instance holding the rows of the batch and a boolean array of their
+        validity.
+
+    Raises:
+        ValueError: an error if strict and a text has no word token.
+    """
+    tokenless = word_tokens.lengths() == 0
+    if strict and tokenless.any():
+        raise ValueError(
+            f"""Text without word tokens received: {raws[np.argmax(tokenless)]!r}. Remove it or use errors="skip" or "fill"."""
+        )
+    if inverse is not None:
+        values, tokenless = values[inverse], tokenless[inverse]
+    # rows of invalid documents are set to fill_value, in place of rows of the valid ones
+    if len(positions) < len(valid) or tokenless.any():
+        valid[positions[tokenless]] = False
+        rows = np.full((len(valid), values.shape[1]), fill_value, dtype=np.float64)
+        rows[positions[~tokenless]] = values[~tokenless]
+        values = rows
+    return csr_matrix(values), valid
+
+
+def _parse(
+    model, max_length, raws, router=None, max_models=models.MAX_MODELS, pool=None
+):
+    """Parses raw texts with a spaCy pipeline, or with the pipeline of the language of each, see models.route.
+
+    Pipelines are taken from pool, a models.ModelPool, by default the pool of the process.
+
+    Returns:
+        A tuple of the list of spaCy docs, a TokenTable of their word tokens, and a TokenTable of their POS.
+    """
+    if not raws:
+        # e.g. a batch of invalid documents only, no pipeline is needed
+        return [], TokenTable.from_lists([]), TokenTable.from_lists([])
+    pool = models.POOL if pool is None else pool
+    pool.max_models = max_models
+    docs = [None] * len(raws)
+    for name, positions in models.route(model, router, raws).items():
+        nlp = pool.get(name)
+        nlp.max_length = max_length
         # removes unwanted processing procedure for better efficiency
-        with nlp.disable_pipes("ner"):
-            self.docs = [nlp(raw) for raw in self.raws]
-        self.word_tokens = [
-            [
-                token_without_punkt.lower()
-                for token_without_punkt in [token.text for token in doc]
-                if re.compile(r"[^\w]+$").match(token_without_punkt) is None
-            ]
-            for doc in self.docs
-        ]
-        self.tags = [[token.pos_ for token in doc] for doc in self.docs]
-
-        results, labels = zip(
-            lex.total_words_extractor(self.word_tokens),
-            lex.avg_word_length_extractor(self.word_tokens),
-            lex.short_words_extractor(self.word_tokens),
-            lex.total_chars_extractor(self.raws),
-            lex.digits_ratio_extractor(self.raws),
-            lex.uppercase_ratio_extractor(self.raws),
-            lex.special_char_extractor(self.raws),
-            lex.letter_extractor(self.raws),
-            lex.digit_extractor(self.raws),
-            lex.bigram_extractor(self.word_tokens),
-            lex.trigram_extractor(self.word_tokens),
-            lex.hapax_legomena_ratio_extractor(self.word_tokens),
-            lex.dis_legomena_ratio_extractor(self.word_tokens),
-            syn.function_word_extractor(self.raws),
-            syn.pos_extractor(self.tags),
-            syn.punctuation_extractor(self.raws),
+        with nlp.disable_pipes(*[pipe for pipe in ("ner",) if pipe in nlp.pipe_names]):
+            for position, doc in zip(
+                positions, nlp.pipe([raws[position] for position in positions])
+            ):
+                docs[position] = doc
+    word_tokens = TokenTable.from_lists(
+        (
+            token_without_punkt.lower()
+            for token_without_punkt in (token.text for token in doc)
+            if re.compile(r"[^\w]+$").match(token_without_punkt) is None
         )
+        for doc in docs
+    )
+    tags = TokenTable.from_lists((token.pos_ for token in doc) for doc in docs)
+    return docs, word_tokens, tags
 
-        results = np.concatenate(results, axis=1)
-        self.feature_names_ = sum(labels, [])
 
-        return csr_matrix(results)
+def _values(raws, word_tokens, tags, vocabularies=(None, None)):
+    """Runs every extractor on a batch and returns the values as one array of shape (len(raws), n_features)."""
+    if not raws:
+        # extractors of raw texts return flat empty lists on an empty batch
+        return np.zeros((0, len(_feature_names(*vocabularies))))
+    results, _ = _extract(raws, word_tokens, tags, vocabularies)
+    return np.concatenate(results, axis=1)
 
-    def fit_transform(self, input):
-        """See self.transform."""
-        return self.transform(input)
 
-    def get_feature_names(self):
-        """Returns Writeprints-Static feature names."""
-        return self.feature_names_
+def _extract(raws, word_tokens, tags, vocabularies=(None, None)):
+    """Runs every extractor on a batch.
+
+    Args:
+        raws: A list of raw texts.
+        word_tokens: A TokenTable of word tokens.
+        tags: A TokenTable of POS.
+        vocabularies: A tuple of the bigram and trigram NgramVocabulary, None for the Brown Corpus lists.
+
+    Returns:
+        A tuple of the per-extractor values and the per-extractor labels.
+    """
+    return zip(
+        lex.total_words_extractor(word_tokens),
+        lex.avg_word_length_extractor(word_tokens),
+        lex.short_words_extractor(word_tokens),
+        lex.total_chars_extractor(raws),
+        lex.digits_ratio_extractor(raws),
+        lex.uppercase_ratio_extractor(raws),
+        lex.special_char_extractor(raws),
+        lex.letter_extractor(raws),
+        lex.digit_extractor(raws),
+        lex.bigram_extractor(word_tokens, vocabularies[0]),
+        lex.trigram_extractor(word_tokens, vocabularies[1]),
+        lex.hapax_legomena_ratio_extractor(word_tokens),
+        lex.dis_legomena_ratio_extractor(word_tokens),
+        syn.function_word_extractor(raws),
+        syn.pos_extractor(tags),
+        syn.punctuation_extractor(raws),
+    )
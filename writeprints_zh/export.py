@@ -0,0 +1,270 @@
+"""This module is used to export Writeprints Static feature matrices to disk and to read them back without copying.
+
+Two layouts are written chunk by chunk, straight from the buffers of the scipy.sparse.csr_matrix chunks produced by
+WriteprintsStatic.iter_transform, so the full matrix never has to be in memory:
+
+- CSR triplets: a directory holding data.npy, indices.npy, and indptr.npy plus a features.json with the shape and the
+  feature names. The arrays are appended to as chunks come in and their .npy headers are patched on close, so
+  read_csr can memory-map them into a csr_matrix.
+- Arrow: one float64 column per feature name, written as an Arrow IPC (Feather v2) file or as Parquet. Columns are
+  handed to Arrow as views of a Fortran-ordered dense chunk. read_arrow memory-maps an IPC file zero-copy. Parquet is
+  compressed and so is decoded on read. Requires pyarrow.
+"""
+
+import json
+import os
+import numpy as np
+from scipy.sparse import csr_matrix
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+# bytes reserved for every .npy header, enough for any 1-d shape, a multiple of 64 as the format recommends
+NPY_HEADER_SIZE = 128
+FORMATS = ("npy", "arrow", "parquet")
+
+
+def export(vectorizer, input, path, format="npy"):
+    """Featurizes raw texts batch by batch and writes the rows as they are produced.
+
+    Args:
+        vectorizer: A WriteprintsStatic instance.
+        input: A list of English raw texts (in string type).
+        path: The output directory ("npy") or file ("arrow", "parquet").
+        format: Any of FORMATS.
+
+    Returns:
+        The number of rows written.
+    """
+    with open_writer(path, vectorizer.get_feature_names(), format) as writer:
+        for X in vectorizer.iter_transform(input):
+            writer.write(X)
+    return writer.n_rows
+
+
+def open_writer(path, feature_names, format="npy"):
+    """Returns a CSRWriter or an ArrowWriter for format, see FORMATS."""
+    if format == "npy":
+        return CSRWriter(path, feature_names)
+    elif format in ("arrow", "parquet"):
+        return ArrowWriter(path, feature_names, format)
+    raise ValueError(f"""Unknown format {format!r}, expected any of {list(FORMATS)}.""")
+
+
+class CSRWriter(object):
+    """CSRWriter
+
+    Appends csr_matrix chunks to data.npy, indices.npy, and indptr.npy in a directory.
+
+    Use as a context manager, or call close when done; the files are not valid .npy files before that.
+
+    Attributes:
+        path: The output directory.
+        feature_names: A list of feature names, one per column.
+        dtype: dtype of data.npy.
+        index_dtype: dtype of indices.npy and indptr.npy. int32 is what scipy uses for matrices of fewer than 2**31
+            stored values, so read_csr can use the files as they are.
+        n_rows: Number of rows written so far.
+        nnz: Number of stored values written so far.
+    """
+
+    def __init__(self, path, feature_names, dtype=np.float64, index_dtype=np.int32):
+        """Initiates CSRWriter and creates the files."""
+        self.path = path
+        self.feature_names = list(feature_names)
+        self.dtype = np.dtype(dtype)
+        self.index_dtype = np.dtype(index_dtype)
+        self.n_rows = 0
+        self.nnz = 0
+        os.makedirs(path, exist_ok=True)
+        self._files = {
+            name: open(os.path.join(path, name + ".npy"), "wb")
+            for name in ("data", "indices", "indptr")
+        }
+        for f in self._files.values():
+            f.write(b"\0" * NPY_HEADER_SIZE)
+        np.zeros(1, dtype=self.index_dtype).tofile(self._files["indptr"])
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, X):
+        """Appends the rows of a chunk.
+
+        Raises:
+            ValueError: an error if X has the wrong number of columns or the index dtype would overflow.
+        """
+        X = csr_matrix(X)
+        if X.shape[1] != len(self.feature_names):
+            raise ValueError(
+                f"""{len(self.feature_names)} columns expected, {X.shape[1]} received."""
+            )
+        if self.nnz + X.nnz > np.iinfo(self.index_dtype).max:
+            raise ValueError(
+                f"""More than {np.iinfo(self.index_dtype).max} stored values, use a wider index_dtype."""
+            )
+        X.sort_indices()
+        X.data.astype(self.dtype, copy=False).tofile(self._files["data"])
+        X.indices.astype(self.index_dtype, copy=False).tofile(self._files["indices"])
+        (X.indptr[1:] + self.nnz).astype(self.index_dtype).tofile(self._files["indptr"])
+        self.n_rows += X.shape[0]
+        self.nnz += X.nnz
+
+    def close(self):
+        """Writes the .npy headers and features.json."""
+        if self._files is None:
+            return
+        for name, dtype, length in (
+            ("data", self.dtype, self.nnz),
+            ("indices", self.index_dtype, self.nnz),
+            ("indptr", self.index_dtype, self.n_rows + 1),
+        ):
+            f = self._files[name]
+            f.seek(0)
+            f.write(_npy_header(dtype, length))
+            f.close()
+        self._files = None
+        with open(os.path.join(self.path, "features.json"), "w") as f:
+            json.dump(
+                {
+                    "shape": [self.n_rows, len(self.feature_names)],
+                    "feature_names": self.feature_names,
+                },
+                f,
+            )
+
+
+def read_csr(path, mmap_mode="r"):
+    """Reads CSR triplets written by CSRWriter.
+
+    Args:
+        path: The directory written by CSRWriter.
+        mmap_mode: numpy.load mmap_mode, None to read the arrays into memory.
+
+    Returns:
+        A tuple of a scipy.sparse.csr_matrix instance, backed by the memory-mapped files when mmap_mode is set, and
+        the list of feature names.
+    """
+    with open(os.path.join(path, "features.json")) as f:
+        meta = json.load(f)
+    data, indices, indptr = (
+        np.load(os.path.join(path, name + ".npy"), mmap_mode=mmap_mode)
+        for name in ("data", "indices", "indptr")
+    )
+    X = csr_matrix((data, indices, indptr), shape=tuple(meta["shape"]), copy=False)
+    return X, meta["feature_names"]
+
+
+class ArrowWriter(object):
+    """ArrowWriter
+
+    Appends csr_matrix chunks as record batches with one float64 column per feature to an Arrow IPC or Parquet file.
+
+    Attributes:
+        path: The output file.
+        feature_names: A list of feature names, one per column.
+        format: "arrow" for Arrow IPC (Feather v2), "parquet" for Parquet.
+        n_rows: Number of rows written so far.
+    """
+
+    def __init__(self, path, feature_names, format="arrow"):
+        """Initiates ArrowWriter and opens the file.
+
+        Raises:
+            ImportError: an error if pyarrow is not installed.
+        """
+        if pa is None:
+            raise ImportError(
+                """pyarrow is required for Arrow and Parquet export, pip install pyarrow."""
+            )
+        self.path = path
+        self.feature_names = list(feature_names)
+        self.format = format
+        self.n_rows = 0
+        self._schema = pa.schema([(name, pa.float64()) for name in self.feature_names])
+        if format == "parquet":
+            self._writer = pq.ParquetWriter(path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(path, self._schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, X):
+        """Appends the rows of a chunk as one record batch."""
+        # a Fortran-ordered chunk keeps every column contiguous, so Arrow wraps it without copying
+        dense = csr_matrix(X, dtype=np.float64).toarray(order="F")
+        batch = pa.RecordBatch.from_arrays(
+            [pa.array(dense[:, j]) for j in range(dense.shape[1])],
+            schema=self._schema,
+        )
+        if self.format == "parquet":
+            self._writer.write_batch(batch)
+        else:
+            self._writer.write(batch)
+        self.n_rows += dense.shape[0]
+
+    def close(self):
+        """Finishes the file."""
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+def read_arrow(path):
+    """Memory-maps an Arrow IPC file written by ArrowWriter.
+
+    Returns:
+        A pyarrow.Table whose buffers point into the mapped file.
+    """
+    if pa is None:
+        raise ImportError(
+            """pyarrow is required for Arrow import, pip install pyarrow."""
+        )
+    with pa.memory_map(str(path)) as source:
+        return pa.ipc.open_file(source).read_all()
+
+
+def read_parquet(path, columns=None):
+    """Reads a Parquet file written by ArrowWriter, memory-mapping it rather than reading it in.
+
+    Args:
+        path: The Parquet file.
+        columns: A list of feature names to read, None for all.
+
+    Returns:
+        A pyarrow.Table.
+    """
+    if pq is None:
+        raise ImportError(
+            """pyarrow is required for Parquet import, pip install pyarrow."""
+        )
+    return pq.read_table(str(path), columns=columns, memory_map=True)
+
+
+def _npy_header(dtype, length):
+    """Returns a version 1.0 .npy header of exactly NPY_HEADER_SIZE bytes for a 1-d array."""
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(dtype),
+            "fortran_order": False,
+            "shape": (length,),
+        }
+    )
+    # magic string (6), version (2), and header length (2) come first, the header ends with a newline
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + "\n"
+    return (
+        b"\x93NUMPY\x01\x00"
+        + len(header).to_bytes(2, "little")
+        + header.encode("latin1")
+    )
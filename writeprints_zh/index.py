@@ -0,0 +1,213 @@
+"""This module is used to hold the WriteprintsIndex class.
+
+WriteprintsIndex answers "which known documents are closest to this questioned document" for authorship attribution
+against a large reference pool. Reference vectors are kept as a float32 matrix with precomputed row norms and running
+column sums, scanned in blocks of rows; each block is scored against a whole batch of queries at once (a BLAS product
+for cosine) and only the running top k per query is kept. A saved index is memory-mapped on load, so a pool larger than
+RAM can be queried straight from disk.
+"""
+
+import json
+import os
+import numpy as np
+from scipy.sparse import issparse
+from writeprints_static import metrics
+
+
+class WriteprintsIndex(object):
+    """WriteprintsIndex
+
+    A k-nearest-neighbor index over Writeprints Static vectors.
+
+    Attributes:
+        metric: Default metric of query, any of "cosine", "manhattan", "delta" (Burrows' Delta, z-scores taken over
+            the indexed documents), and "minmax".
+        normalizer: An optional fitted WriteprintsNormalizer applied to vectors on add and on query.
+        block_size: Number of reference vectors scored at a time.
+        labels_: A list of the label (e.g. author) of every indexed vector.
+    """
+
+    def __init__(self, metric="cosine", normalizer=None, block_size=65536):
+        """Initiates WriteprintsIndex."""
+        self.metric = metric
+        self.normalizer = normalizer
+        self.block_size = block_size
+        self.labels_ = []
+        self._vectors = None
+        self._norms = None
+        self._sums = None
+        self._squares = None
+
+    def __len__(self):
+        """Returns the number of indexed vectors."""
+        return len(self.labels_)
+
+    @property
+    def vectors_(self):
+        """The indexed vectors, a float32 array of shape (len(self), n_features)."""
+        return self._vectors[: len(self)]
+
+    def add(self, X, labels):
+        """Appends vectors to the index.
+
+        Storage grows geometrically, so adding in many small batches is cheap. Adding to a memory-mapped index loads
+        it into memory first.
+
+        Args:
+            X: WriteprintsStatic output, a scipy.sparse matrix or an array of shape (n, n_features).
+            labels: A list of n labels.
+
+        Returns:
+            self.
+
+        Raises:
+            ValueError: an error if X and labels differ in length, X has the wrong number of features, or a vector has
+                NaN or infinite values (e.g. the rows of invalid documents with errors="fill").
+        """
+        X = self._prepare(X)
+        if X.shape[0] != len(labels):
+            raise ValueError(
+                f"""{X.shape[0]} vectors and {len(labels)} labels received."""
+            )
+        finite = np.isfinite(X).all(axis=1)
+        if not finite.all():
+            raise ValueError(
+                f"""Finite vectors expected, rows {np.flatnonzero(~finite).tolist()} have NaN or infinite values."""
+            )
+        n, size = len(self), len(self) + X.shape[0]
+        if self._vectors is None:
+            self._allocate(max(size, 1), X.shape[1])
+        elif size > self._vectors.shape[0] or isinstance(self._vectors, np.memmap):
+            self._allocate(max(size, 2 * self._vectors.shape[0]), X.shape[1])
+        self._vectors[n:size] = X
+        self._norms[n:size] = metrics.row_norms(X)
+        self._sums += X.sum(axis=0, dtype=np.float64)
+        self._squares += np.square(X, dtype=np.float64).sum(axis=0)
+        self.labels_.extend(labels)
+        return self
+
+    def query(self, X, k=10, metric=None):
+        """Finds the k nearest indexed vectors of every query.
+
+        Args:
+            X: WriteprintsStatic output of the queries, a scipy.sparse matrix or an array of shape (n, n_features).
+            k: Number of neighbors.
+            metric: Metric to use instead of self.metric.
+
+        Returns:
+            A tuple of two arrays of shape (n, k), distances sorted ascending and the indices of the neighbors in the
+            index. Use labels_ to map indices to labels. Fewer than k columns are returned if the index is smaller.
+
+        Raises:
+            ValueError: an error if the metric is unknown or the index is empty.
+        """
+        metric = self.metric if metric is None else metric
+        if metric not in metrics.METRICS:
+            raise ValueError(
+                f"""Unknown metric {metric!r}, expected any of {list(metrics.METRICS)}."""
+            )
+        if not len(self):
+            raise ValueError("""Add vectors before query.""")
+        X = self._prepare(X)
+        k = min(k, len(self))
+        X_norms = metrics.row_norms(X)
+        mean, std = self._moments()
+
+        best_distances = np.full((X.shape[0], 0), np.inf, dtype=np.float32)
+        best_indices = np.zeros((X.shape[0], 0), dtype=np.int64)
+        for start in range(0, len(self), self.block_size):
+            stop = min(start + self.block_size, len(self))
+            distances = metrics.distances(
+                X,
+                self._vectors[start:stop],
+                metric,
+                X_norms,
+                self._norms[start:stop],
+                mean,
+                std,
+            )
+            best_distances, best_indices = metrics.merge_top_k(
+                best_distances, best_indices, distances, start, k
+            )
+
+        return metrics.sort_top_k(best_distances, best_indices)
+
+    def save(self, path):
+        """Writes the index to the directory path, which is created if needed.
+
+        The normalizer is not saved, pass it again to load. Every file is written under a temporary name and renamed
+        into place, so an index loaded from path, whose vectors are memory-mapped, can be saved back to it.
+        """
+        os.makedirs(path, exist_ok=True)
+        _save(os.path.join(path, "vectors.npy"), self.vectors_)
+        _save(os.path.join(path, "norms.npy"), self._norms[: len(self)])
+        _save(os.path.join(path, "moments.npy"), np.stack([self._sums, self._squares]))
+        tmp_path = os.path.join(path, f"index.json.{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {
+                    "metric": self.metric,
+                    "block_size": self.block_size,
+                    "labels": self.labels_,
+                },
+                f,
+            )
+        os.replace(tmp_path, os.path.join(path, "index.json"))
+
+    @classmethod
+    def load(cls, path, normalizer=None, mmap_mode="r"):
+        """Reads an index written by save.
+
+        Args:
+            path: The directory of the index.
+            normalizer: The WriteprintsNormalizer the index was built with, if any.
+            mmap_mode: numpy.load mmap_mode of the vectors, None to read them into memory.
+
+        Returns:
+            A WriteprintsIndex instance.
+        """
+        with open(os.path.join(path, "index.json")) as f:
+            meta = json.load(f)
+        index = cls(meta["metric"], normalizer, meta["block_size"])
+        index.labels_ = meta["labels"]
+        index._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mmap_mode)
+        index._norms = np.load(os.path.join(path, "norms.npy"))
+        index._sums, index._squares = np.load(os.path.join(path, "moments.npy"))
+        return index
+
+    def _prepare(self, X):
+        """Normalizes X if a normalizer is set, and returns it as a dense float32 array."""
+        if self.normalizer is not None:
+            X = self.normalizer.transform(X)
+        X = X.toarray() if issparse(X) else np.asarray(X)
+        if self._vectors is not None and X.shape[1] != self._vectors.shape[1]:
+            raise ValueError(
+                f"""{self._vectors.shape[1]} features expected, {X.shape[1]} received."""
+            )
+        return X.astype(np.float32)
+
+    def _allocate(self, capacity, n_features):
+        """Moves the vectors and norms into in-memory buffers of the given capacity."""
+        vectors = np.zeros((capacity, n_features), dtype=np.float32)
+        norms = np.zeros(capacity, dtype=np.float32)
+        if self._vectors is None:
+            self._sums = np.zeros(n_features)
+            self._squares = np.zeros(n_features)
+        else:
+            vectors[: len(self)] = self._vectors[: len(self)]
+            norms[: len(self)] = self._norms[: len(self)]
+        self._vectors, self._norms = vectors, norms
+
+    def _moments(self):
+        """Returns the per-column mean and standard deviation of the indexed vectors."""
+        mean = self._sums / len(self)
+        std = np.sqrt(np.maximum(self._squares / len(self) - mean**2, 0))
+        return mean, std
+
+
+def _save(path, array):
+    """Writes an array to a .npy file under a temporary name and renames it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        np.save(f, array)
+    os.replace(tmp_path, path)
@@ -0,0 +1,328 @@
+"""This module is used to run long WriteprintsStatic extractions as checkpointed, resumable jobs.
+
+An ExtractionJob splits the input into numbered chunks of consecutive documents and keeps everything in a job
+directory:
+
+- manifest.json: the input offsets and a digest of the texts of every chunk, the number of documents, the feature
+  names, and a hash of the vectorizer configuration. It is written once, when the job is created, and checked on every
+  later run so that a job is never resumed with other texts or another configuration.
+- chunk-<id>.npz: the rows of a finished chunk. A chunk is written to a temporary file and renamed into place, so a
+  chunk file is either complete or absent, and a run skips the chunks whose file exists.
+- chunk-<id>.valid.npy: the validity of every document of a finished chunk (see WriteprintsStatic.valid_mask_), written
+  before the rows. With errors="skip", it maps the rows back to the documents they belong to.
+- chunk-<id>.lock: the process id of the worker featurizing a chunk and a token unique to the lock. Locks are taken
+  exclusively, so several worker processes (of one run or of several runs on the same directory) do not featurize a
+  chunk twice. A lock left by a process that died is stale: it is taken over by renaming a new lock over it, and the
+  lock is read back to confirm which worker won. A worker only ever removes a lock holding its own token. If a worker
+  takes over a stale lock after another one has already confirmed it, both featurize the chunk. This is the one case
+  of duplicate work, and it is harmless since the chunk file is replaced atomically with identical rows.
+"""
+
+import hashlib
+import json
+import os
+import uuid
+import numpy as np
+from joblib import Parallel, delayed
+from scipy.sparse import load_npz, save_npz, vstack
+
+# parameters which do not change the rows WriteprintsStatic outputs
+RUNTIME_PARAMS = (
+    "retain",
+    "batch_size",
+    "n_jobs",
+    "deduplicate",
+    "memory_budget",
+    "max_models",
+)
+
+
+class ExtractionJob(object):
+    """ExtractionJob
+
+    A resumable featurization of a list of raw texts, checkpointed chunk by chunk.
+
+    Attributes:
+        vectorizer: A WriteprintsStatic instance, fitted if it learns n-grams.
+        path: The job directory.
+        chunk_size: Number of documents per chunk, only used when the job is created.
+        manifest: The manifest dict, once the job is created or opened.
+        valid_mask_: A boolean array of the validity of every document of the chunks read by iter_results or result.
+    """
+
+    def __init__(self, vectorizer, path, chunk_size=10000):
+        """Initiates ExtractionJob."""
+        self.vectorizer = vectorizer
+        self.path = path
+        self.chunk_size = chunk_size
+        self.manifest = None
+        self.valid_mask_ = None
+
+    def run(self, input, n_workers=1):
+        """Featurizes the chunks not finished yet, creating the job on the first run.
+
+        Args:
+            input: A list of English raw texts (in string type), the same on every run.
+            n_workers: Number of worker processes taking chunks, -1 for all cores.
+
+        Returns:
+            self.
+
+        Raises:
+            ValueError: an error if the job directory holds a job over other texts or with another configuration.
+        """
+        self._open(input)
+        completed = self.completed()
+        Parallel(n_jobs=n_workers)(
+            delayed(_run_chunk)(
+                self.vectorizer,
+                self.path,
+                chunk["id"],
+                input[chunk["start"] : chunk["stop"]],
+            )
+            for chunk in self.manifest["chunks"]
+            if chunk["id"] not in completed
+        )
+        return self
+
+    def completed(self):
+        """Returns the set of ids of the chunks whose rows are written."""
+        return {
+            chunk["id"]
+            for chunk in self.manifest["chunks"]
+            if os.path.exists(_chunk_path(self.path, chunk["id"]))
+        }
+
+    def done(self):
+        """Returns whether every chunk is written."""
+        return len(self.completed()) == len(self.manifest["chunks"])
+
+    def iter_results(self):
+        """Yields the rows of every chunk in input order as scipy.sparse.csr_matrix instances.
+
+        valid_mask_ is extended with the validity of the documents of every chunk yielded. With errors="skip", the rows
+        of invalid documents are left out, and input[valid_mask_] are the documents of the rows.
+
+        Raises:
+            ValueError: an error if a chunk is not written yet.
+        """
+        if not self.done():
+            raise ValueError(
+                f"""{len(self.manifest["chunks"]) - len(self.completed())} chunks are not finished, run the job first."""
+            )
+        self.valid_mask_ = np.zeros(0, dtype=bool)
+        for chunk in self.manifest["chunks"]:
+            self.valid_mask_ = np.concatenate(
+                [self.valid_mask_, np.load(_valid_path(self.path, chunk["id"]))]
+            )
+            yield load_npz(_chunk_path(self.path, chunk["id"])).tocsr()
+
+    def result(self):
+        """Returns the rows of all chunks stacked, see iter_results."""
+        return vstack(list(self.iter_results()), format="csr")
+
+    def _open(self, input):
+        """Reads the manifest of the job directory and checks it against input, or creates it."""
+        manifest_path = os.path.join(self.path, "manifest.json")
+        chunks = [
+            {
+                "id": id,
+                "start": start,
+                "stop": min(start + self.chunk_size, len(input)),
+                "digest": texts_digest(input[start : start + self.chunk_size]),
+            }
+            for id, start in enumerate(range(0, len(input), self.chunk_size))
+        ]
+        manifest = {
+            "n_documents": len(input),
+            "config_hash": config_hash(self.vectorizer),
+            "feature_names": self.vectorizer.get_feature_names(),
+            "chunks": chunks,
+        }
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                existing = json.load(f)
+            if existing["config_hash"] != manifest["config_hash"]:
+                raise ValueError(
+                    f"""The job in {self.path} was created with another configuration."""
+                )
+            if existing["n_documents"] != len(input) or any(
+                chunk["digest"] != texts_digest(input[chunk["start"] : chunk["stop"]])
+                for chunk in existing["chunks"]
+            ):
+                raise ValueError(
+                    f"""The job in {self.path} was created over other texts."""
+                )
+            manifest = existing
+        else:
+            os.makedirs(self.path, exist_ok=True)
+            atomic_write(manifest_path, json.dumps(manifest).encode())
+        self.manifest = manifest
+
+
+def config_hash(vectorizer):
+    """Returns a hash of everything which determines the rows a vectorizer outputs.
+
+    The hash covers the constructor parameters but RUNTIME_PARAMS, and the feature names, so two vectorizers with
+    different learned n-grams hash differently.
+    """
+    config = {
+        "params": config_params(vectorizer),
+        "feature_names": vectorizer.get_feature_names(),
+    }
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def config_params(vectorizer):
+    """Returns the constructor parameters of a vectorizer but RUNTIME_PARAMS, as strings which are the same in every
+    process.
+
+    Functions (e.g. a router) are named by their module and qualified name, since their repr holds a memory address.
+    """
+    return {
+        name: _param_repr(value)
+        for name, value in vectorizer.get_params().items()
+        if name not in RUNTIME_PARAMS
+    }
+
+
+def texts_digest(texts):
+    """Returns a digest of a list of raw texts."""
+    digest = hashlib.blake2b(digest_size=16)
+    for text in texts:
+        encoded = text.encode("utf-8", "surrogatepass")
+        digest.update(len(encoded).to_bytes(8, "little"))
+        digest.update(encoded)
+    return digest.hexdigest()
+
+
+def atomic_write(path, data):
+    """Writes bytes to path so that readers see either the former content or data, never a partial file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _param_repr(value):
+    """Returns the repr of a parameter, or the module and qualified name of a function."""
+    if callable(value) and hasattr(value, "__qualname__"):
+        return f"{value.__module__}.{value.__qualname__}"
+    return repr(value)
+
+
+def _run_chunk(vectorizer, path, id, texts):
+    """Featurizes a chunk unless it is written or locked by a live worker.
+
+    Returns:
+        Whether this worker featurized the chunk.
+    """
+    if os.path.exists(_chunk_path(path, id)):
+        return False
+    token = _lock(path, id)
+    if token is None:
+        return False
+    try:
+        # another worker may have finished the chunk between the check and the lock
+        if os.path.exists(_chunk_path(path, id)):
+            return False
+        X = vectorizer.transform(texts)
+        tmp_path = f"{_valid_path(path, id)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, vectorizer.valid_mask_)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, _valid_path(path, id))
+        tmp_path = f"{_chunk_path(path, id)}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            save_npz(f, X, compressed=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, _chunk_path(path, id))
+    finally:
+        _unlock(path, id, token)
+    return True
+
+
+def _lock(path, id):
+    """Takes the lock of a chunk, taking over a lock whose process is gone.
+
+    A lock is moved into place from a file already holding its content, so it is never seen empty: linked if there is
+    no lock, renamed over a stale one and then read back, since another worker may have renamed its own lock over it
+    in between.
+
+    Returns:
+        The token of the lock, None if it was not taken.
+    """
+    lock_path = _lock_path(path, id)
+    token = f"{os.getpid()} {uuid.uuid4().hex}"
+    tmp_path = f"{lock_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(token)
+    try:
+        for _ in range(2):
+            try:
+                os.link(tmp_path, lock_path)
+                return token
+            except FileExistsError:
+                pass
+            content = _read_lock(lock_path)
+            if content is None:
+                continue
+            if _alive(int(content.split()[0])):
+                return None
+            os.replace(tmp_path, lock_path)
+            return token if _read_lock(lock_path) == token else None
+        return None
+    finally:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+
+def _unlock(path, id, token):
+    """Removes the lock of a chunk if it still holds token."""
+    lock_path = _lock_path(path, id)
+    if _read_lock(lock_path) == token:
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+
+
+def _read_lock(lock_path):
+    """Returns the content of a lock, None if there is none."""
+    try:
+        with open(lock_path) as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def _alive(pid):
+    """Returns whether a local process is running."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _chunk_path(path, id):
+    """Returns the path of the rows of a chunk."""
+    return os.path.join(path, f"chunk-{id:05d}.npz")
+
+
+def _valid_path(path, id):
+    """Returns the path of the validity of the documents of a chunk."""
+    return os.path.join(path, f"chunk-{id:05d}.valid.npy")
+
+
+def _lock_path(path, id):
+    """Returns the path of the lock of a chunk."""
+    return os.path.join(path, f"chunk-{id:05d}.lock")
@@ -4,6 +4,8 @@ For every feature, we document the description of the original feature, the tech
 known differences between the original feature and our engineering.
 """
 import string
+import numpy as np
+from writeprints_static.ngrams import NgramVocabulary
 
 # fmt: off
 SPECIALS = ['~', '@', '#', '$', '%', '^', '&', '*', '-', '_', '=', '+', '>', '<', '[', ']', '{', '}', '/', '\\', '|']
@@ -13,6 +15,8 @@ BIGRAMS = ['th', 'he', 'in', 'er', 'an', 're', 'on', 'at', 'en', 'nd', 'ed', 'or
 TRIGRAMS = ['the', 'and', 'ing', 'ion', 'ent', 'tio', 'her', 'for', 'hat', 'tha', 'his', 'ter', 'ere', 'ati', 'ate',
             'was', 'all', 'ver', 'ith', 'thi']
 # fmt: on
+BIGRAM_VOCABULARY = NgramVocabulary.from_ngrams(BIGRAMS)
+TRIGRAM_VOCABULARY = NgramVocabulary.from_ngrams(TRIGRAMS)
 
 
 def total_words_extractor(word_tokens):
@@ -28,12 +32,12 @@ def total_words_extractor(word_tokens):
     Note that there are many different English-language tokenizers.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
 
     Returns:
         Number of words in the document.
     """
-    total_words = [[len(word_token)] for word_token in word_tokens]
+    total_words = word_tokens.lengths()[:, None]
     label = ["total_words"]
 
     return total_words, label
@@ -49,15 +53,15 @@ def avg_word_length_extractor(word_tokens):
     Known differences with Writeprints Static feature "average word length": None.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
 
     Returns:
         Average length of words in the document.
     """
-    avg_word_length = [
-        [sum([len(word) for word in word_token]) / len(word_token)]
-        for word_token in word_tokens
-    ]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        avg_word_length = (
+            word_tokens.counts() @ word_tokens.vocab_lengths() / word_tokens.lengths()
+        )[:, None]
     label = ["avg_word_length"]
 
     return avg_word_length, label
@@ -71,15 +75,12 @@ def short_words_extractor(word_tokens):
     Known differences with Writeprints Static feature "number of short words": None.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
 
     Returns:
         The number of short words in the document.
     """
-    short_words = [
-        [len([word for word in word_token if len(word) < 4])]
-        for word_token in word_tokens
-    ]
+    short_words = (word_tokens.counts() @ (word_tokens.vocab_lengths() < 4))[:, None]
     label = ["short_words"]
 
     return short_words, label
@@ -117,6 +118,8 @@ def digits_ratio_extractor(raws):
 
     Known differences with Writeprints Static feature "percentage of digits": None.
 
+    Whitespace-only documents get NaN.
+
     Args:
         raws: List of documents.
 
@@ -124,7 +127,13 @@ def digits_ratio_extractor(raws):
         Percentage of digits over all characters in the document.
     """
     digits_ratio = [
-        [len([char for char in raw if char.isdigit()]) / len(raw.rstrip())]
+        [
+            (
+                len([char for char in raw if char.isdigit()]) / len(raw.rstrip())
+                if raw.rstrip()
+                else np.nan
+            )
+        ]
         for raw in raws
     ]
     label = ["digits_ratio"]
@@ -139,6 +148,8 @@ def uppercase_ratio_extractor(raws):
 
     Known differences with Writeprints Static feature "percentage of uppercase letters": None.
 
+    Whitespace-only documents get NaN.
+
     Args:
         raws: List of documents.
 
@@ -146,7 +157,13 @@ def uppercase_ratio_extractor(raws):
         Percentage of uppercase letters over all characters in the document.
     """
     uppercase_ratio = [
-        [len([char for char in raw if char.isupper()]) / len(raw.rstrip())]
+        [
+            (
+                len([char for char in raw if char.isupper()]) / len(raw.rstrip())
+                if raw.rstrip()
+                else np.nan
+            )
+        ]
         for raw in raws
     ]
     label = ["uppercase_ratio"]
@@ -222,67 +239,48 @@ def digit_extractor(raws):
     return digit_, label
 
 
-def bigram_extractor(word_tokens):
+def bigram_extractor(word_tokens, vocabulary=None):
     """bigram_
 
-    39 common letter bigrams in the text, case insensitive, within words.
+    Common letter bigrams in the text (39 by default), case insensitive, within words.
 
     Known differences with Writeprints Static feature "percentage of common bigrams": The most frequent 39 character
-    bigrams in the Brown Corpus are used as an alternative since we cannot find the original bigrams.
+    bigrams in the Brown Corpus are used as an alternative since we cannot find the original bigrams. A
+    vocabulary learned from the corpus at hand can be passed instead, see NgramVocabulary.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
+        vocabulary: An NgramVocabulary of bigrams, None for the Brown Corpus bigrams.
 
     Returns:
         Frequencies of character bigrams in the document.
     """
-    all_bigrams = [
-        sum(
-            [
-                [(word[x : x + 2]) for x in range(len(word) - (2 - 1))]
-                for word in word_token
-            ],
-            [],
-        )
-        for word_token in word_tokens
-    ]
-    bigram_ = [
-        [all_bigram.count(bigram) for bigram in BIGRAMS] for all_bigram in all_bigrams
-    ]
-    label = ["bigram_" + bigram for bigram in BIGRAMS]
+    vocabulary = BIGRAM_VOCABULARY if vocabulary is None else vocabulary
+    bigram_ = vocabulary.transform(word_tokens)
+    label = ["bigram_" + bigram for bigram in vocabulary.ngrams_]
 
     return bigram_, label
 
 
-def trigram_extractor(word_tokens):
+def trigram_extractor(word_tokens, vocabulary=None):
     """trigram_
 
-    20 common letter trigrams in the text, case insensitive, within words.
+    Common letter trigrams in the text (20 by default), case insensitive, within words.
 
     Known differences with Writeprints Static feature "percentage of common trigrams": The most frequent 20 character
-    trigrams in the Brown Corpus are used as an alternative since we cannot find the original trigrams.
+    trigrams in the Brown Corpus are used as an alternative since we cannot find the original trigrams. A
+    vocabulary learned from the corpus at hand can be passed instead, see NgramVocabulary.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
+        vocabulary: An NgramVocabulary of trigrams, None for the Brown Corpus trigrams.
 
     Returns:
         Frequencies of character trigrams in the document.
     """
-    all_trigrams = [
-        sum(
-            [
-                [(word[x : x + 3]) for x in range(len(word) - (3 - 1))]
-                for word in word_token
-            ],
-            [],
-        )
-        for word_token in word_tokens
-    ]
-    trigram_ = [
-        [all_trigram.count(trigram) for trigram in TRIGRAMS]
-        for all_trigram in all_trigrams
-    ]
-    label = ["trigram_" + trigram for trigram in TRIGRAMS]
+    vocabulary = TRIGRAM_VOCABULARY if vocabulary is None else vocabulary
+    trigram_ = vocabulary.transform(word_tokens)
+    label = ["trigram_" + trigram for trigram in vocabulary.ngrams_]
 
     return trigram_, label
 
@@ -298,18 +296,14 @@ def hapax_legomena_ratio_extractor(word_tokens):
     Known differences with Writeprints Static feature "Ratio of hapax legomena": None.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
 
     Returns:
         Ratio of hapax legomena in the document.
     """
-    hapax_legomena_ratio = [
-        [
-            len([word for word in word_token if word_token.count(word) == 1])
-            / len(set([word for word in word_token]))
-        ]
-        for word_token in word_tokens
-    ]
+    occurring, distinct = _legomena(word_tokens, 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        hapax_legomena_ratio = (occurring / distinct)[:, None]
     label = ["hapax_legomena_ratio"]
 
     return hapax_legomena_ratio, label
@@ -326,18 +320,28 @@ def dis_legomena_ratio_extractor(word_tokens):
     Known differences with Writeprints Static feature "Ratio of dis legomena": None.
 
     Args:
-        word_tokens: List of lists of token.text in spaCy doc instances.
+        word_tokens: A TokenTable of token.text in spaCy doc instances.
 
     Returns:
         Ratio of dis legomena in the document.
     """
-    dis_legomena_ratio = [
-        [
-            len([word for word in word_token if word_token.count(word) == 2])
-            / (2 * len(set([word for word in word_token])))
-        ]
-        for word_token in word_tokens
-    ]
+    occurring, distinct = _legomena(word_tokens, 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        dis_legomena_ratio = (occurring / (2 * distinct))[:, None]
     label = ["dis_legomena_ratio"]
 
     return dis_legomena_ratio, label
+
+
+def _legomena(word_tokens, times):
+    """Counts words occurring exactly `times` times, and distinct words, in every document.
+
+    Note that every occurrence of such a word is counted, i.e. a dis legomenon contributes 2.
+    """
+    counts = word_tokens.counts()
+    distinct = np.diff(counts.indptr)
+    rows = np.repeat(np.arange(counts.shape[0]), distinct)
+    occurring = times * np.bincount(
+        rows[counts.data == times], minlength=counts.shape[0]
+    )
+    return occurring, distinct
@@ -0,0 +1,191 @@
+"""This module is used to compute distances between Writeprints Static vectors.
+
+Every function takes two dense 2-d arrays of row vectors and returns the matrix of distances between their rows.
+Cosine distance is a single BLAS matrix product; distances without a product form are computed over slices of rows
+so that the broadcast intermediate stays under `working_memory` bytes.
+"""
+
+import numpy as np
+
+METRICS = ("cosine", "manhattan", "delta", "minmax")
+# bytes of the broadcast intermediate used by non-BLAS metrics
+WORKING_MEMORY = 64 * 2**20
+
+
+def distances(
+    X,
+    Y,
+    metric,
+    X_norms=None,
+    Y_norms=None,
+    mean=None,
+    std=None,
+    working_memory=WORKING_MEMORY,
+):
+    """Distances by metric name.
+
+    Args:
+        X: An array of shape (n, d).
+        Y: An array of shape (m, d).
+        metric: Any of METRICS.
+        X_norms: Precomputed row_norms(X), optional, used by cosine.
+        Y_norms: Precomputed row_norms(Y), optional, used by cosine.
+        mean: Per-column mean of the reference corpus, required by delta.
+        std: Per-column standard deviation of the reference corpus, required by delta.
+        working_memory: Upper bound in bytes of the broadcast intermediate of non-BLAS metrics.
+
+    Returns:
+        An array of shape (n, m).
+
+    Raises:
+        ValueError: an error if the metric is unknown.
+    """
+    if metric == "cosine":
+        return cosine_distances(X, Y, X_norms, Y_norms)
+    elif metric == "manhattan":
+        return manhattan_distances(X, Y, working_memory)
+    elif metric == "delta":
+        return delta_distances(X, Y, mean, std, working_memory)
+    elif metric == "minmax":
+        return minmax_distances(X, Y, working_memory)
+    raise ValueError(f"""Unknown metric {metric!r}, expected any of {list(METRICS)}.""")
+
+
+def row_norms(X):
+    """Returns the Euclidean norm of every row of X."""
+    return np.sqrt(np.einsum("ij,ij->i", X, X))
+
+
+def cosine_distances(X, Y, X_norms=None, Y_norms=None):
+    """Cosine distances, one minus the cosine similarity.
+
+    Rows of zero norm are at distance one from everything.
+
+    Args:
+        X: An array of shape (n, d).
+        Y: An array of shape (m, d).
+        X_norms: Precomputed row_norms(X), optional.
+        Y_norms: Precomputed row_norms(Y), optional.
+
+    Returns:
+        An array of shape (n, m).
+    """
+    X_norms = row_norms(X) if X_norms is None else X_norms
+    Y_norms = row_norms(Y) if Y_norms is None else Y_norms
+    similarities = X @ Y.T
+    with np.errstate(divide="ignore", invalid="ignore"):
+        similarities /= np.outer(X_norms, Y_norms)
+    similarities[~np.isfinite(similarities)] = 0
+    return 1 - similarities
+
+
+def manhattan_distances(X, Y, working_memory=WORKING_MEMORY):
+    """Manhattan (L1) distances.
+
+    Args:
+        X: An array of shape (n, d).
+        Y: An array of shape (m, d).
+        working_memory: Upper bound in bytes of the broadcast intermediate.
+
+    Returns:
+        An array of shape (n, m).
+    """
+    distances = np.empty((X.shape[0], Y.shape[0]), dtype=np.result_type(X, Y))
+    step = _rows_per_slice(Y.shape[0], X.shape[1], distances.itemsize, working_memory)
+    for start in range(0, X.shape[0], step):
+        distances[start : start + step] = np.abs(
+            X[start : start + step, None, :] - Y[None, :, :]
+        ).sum(axis=2)
+    return distances
+
+
+def delta_distances(X, Y, mean, std, working_memory=WORKING_MEMORY):
+    """Burrows' Delta, the mean absolute difference of z-scores.
+
+    Columns of zero standard deviation carry no information and are left out.
+
+    Args:
+        X: An array of shape (n, d).
+        Y: An array of shape (m, d).
+        mean: Per-column mean of the reference corpus.
+        std: Per-column standard deviation of the reference corpus.
+        working_memory: Upper bound in bytes of the broadcast intermediate.
+
+    Returns:
+        An array of shape (n, m).
+    """
+    informative = std > 0
+    dtype = np.result_type(X, Y)
+    scale = std[informative].astype(dtype)
+    shift = mean[informative].astype(dtype)
+    X = (X[:, informative] - shift) / scale
+    Y = (Y[:, informative] - shift) / scale
+    return manhattan_distances(X, Y, working_memory) / max(informative.sum(), 1)
+
+
+def minmax_distances(X, Y, working_memory=WORKING_MEMORY):
+    """Min-max (Ruzicka) distances, one minus the sum of elementwise minima over the sum of elementwise maxima.
+
+    Only defined for non-negative vectors. As min(a, b) + max(a, b) == a + b and max(a, b) - min(a, b) == |a - b|, the
+    distance is 2 * L1 / (sum(x) + sum(y) + L1), so it costs one Manhattan pass. Two zero vectors are at distance zero.
+
+    Args:
+        X: An array of shape (n, d).
+        Y: An array of shape (m, d).
+        working_memory: Upper bound in bytes of the broadcast intermediate.
+
+    Returns:
+        An array of shape (n, m).
+    """
+    l1 = manhattan_distances(X, Y, working_memory)
+    maxima = X.sum(axis=1)[:, None] + Y.sum(axis=1)[None, :] + l1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distances = 2 * l1 / maxima
+    distances[maxima == 0] = 0
+    return distances
+
+
+def merge_top_k(best_distances, best_indices, distances, offset, k):
+    """Merges a block of distances into the running k smallest distances of every row.
+
+    Args:
+        best_distances: The running smallest distances, an array of shape (n, <= k).
+        best_indices: Column indices of best_distances, an array of shape (n, <= k).
+        distances: A block of distances of shape (n, m).
+        offset: Column index of the first column of the block.
+        k: Number of distances to keep.
+
+    Returns:
+        A tuple of the merged best_distances and best_indices, unsorted.
+    """
+    candidates = _smallest(distances, k)
+    best_distances = np.concatenate(
+        [best_distances, np.take_along_axis(distances, candidates, axis=1)], axis=1
+    )
+    best_indices = np.concatenate([best_indices, candidates + offset], axis=1)
+    kept = _smallest(best_distances, k)
+    return (
+        np.take_along_axis(best_distances, kept, axis=1),
+        np.take_along_axis(best_indices, kept, axis=1),
+    )
+
+
+def sort_top_k(best_distances, best_indices):
+    """Sorts the running k smallest distances of every row ascending."""
+    order = np.argsort(best_distances, axis=1, kind="stable")
+    return (
+        np.take_along_axis(best_distances, order, axis=1),
+        np.take_along_axis(best_indices, order, axis=1),
+    )
+
+
+def _smallest(distances, k):
+    """Returns the column indices of the k smallest distances of every row, unsorted."""
+    if distances.shape[1] <= k:
+        return np.tile(np.arange(distances.shape[1]), (distances.shape[0], 1))
+    return np.argpartition(distances, k - 1, axis=1)[:, :k]
+
+
+def _rows_per_slice(n_columns, n_features, itemsize, working_memory):
+    """Returns how many rows can be broadcast against n_columns rows within working_memory bytes."""
+    return max(1, working_memory // max(1, n_columns * n_features * itemsize))
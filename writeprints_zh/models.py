@@ -0,0 +1,91 @@
+"""This module is used to hold the spaCy pipelines used by WriteprintsStatic.
+
+Pipelines are loaded lazily, on the first document that needs them, into a per-process ModelPool which keeps at most
+`max_models` of them resident and evicts the least recently used one beyond that. A mixed-language corpus thus only
+pays the load time and memory of the languages actually present, and joblib workers each fill their own pool.
+
+For such corpora, WriteprintsStatic takes a dict of pipelines by language and a router, a function returning the
+language of a raw text. script_language, the default router, tells Chinese from English by the script of the text.
+"""
+
+from collections import OrderedDict
+from collections.abc import Mapping
+import spacy
+
+# pipelines resident per process by default
+MAX_MODELS = 2
+
+
+class ModelPool(object):
+    """ModelPool
+
+    A bounded, least recently used cache of loaded spaCy pipelines, by name or path.
+
+    Attributes:
+        max_models: Number of pipelines kept loaded at most.
+        loads: Number of pipelines loaded so far, evicted ones included.
+    """
+
+    def __init__(self, max_models=MAX_MODELS):
+        """Initiates ModelPool."""
+        self.max_models = max_models
+        self.loads = 0
+        self._models = OrderedDict()
+
+    def __len__(self):
+        """Returns the number of resident pipelines."""
+        return len(self._models)
+
+    def __contains__(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """Returns a pipeline, loading it if it is not resident and evicting the least recently used ones."""
+        if name in self._models:
+            self._models.move_to_end(name)
+            return self._models[name]
+        nlp = spacy.load(name)
+        self.loads += 1
+        self._models[name] = nlp
+        while len(self._models) > max(1, self.max_models):
+            self._models.popitem(last=False)
+        return nlp
+
+
+# the pool of the current process
+POOL = ModelPool()
+
+
+def script_language(raw):
+    """Returns "zh" if at least a tenth of the letters of a text are CJK ideographs, "en" otherwise."""
+    letters = [char for char in raw if char.isalpha()]
+    cjk = sum(1 for char in letters if "一" <= char <= "鿿")
+    return "zh" if letters and cjk * 10 >= len(letters) else "en"
+
+
+def route(model, router, raws):
+    """Groups raw texts by the pipeline they are parsed with.
+
+    Args:
+        model: A pipeline name or path (str or pathlib.Path), or a dict of them by language.
+        router: A function returning the language of a raw text, used if model is a dict. None for script_language.
+        raws: A list of raw texts.
+
+    Returns:
+        A dict of the positions in raws of the texts of every pipeline, by pipeline name, in order of first use.
+
+    Raises:
+        ValueError: an error if a text is routed to a language missing from model.
+    """
+    if not isinstance(model, Mapping):
+        return {model: list(range(len(raws)))}
+    router = script_language if router is None else router
+    groups = {}
+    for position, raw in enumerate(raws):
+        language = router(raw)
+        if language not in model:
+            raise ValueError(
+                f"""No pipeline for language {language!r}, expected any of {list(model)}."""
+            )
+        groups.setdefault(model[language], []).append(position)
+    return groups
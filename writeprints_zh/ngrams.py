@@ -0,0 +1,182 @@
+"""This module is used to hold the NgramVocabulary class.
+
+Writeprints Static counts a fixed list of common letter bigrams and trigrams. NgramVocabulary generalizes the list: it
+is either given (as the Brown Corpus lists in lexical_features are) or learned from a corpus as its top-k character
+n-grams within words.
+
+Character n-grams of up to three characters are packed into one int64 key (21 bits per Unicode code point), which is
+an exact, collision-free hash, so both learning and counting run on numpy integer arrays:
+
+- fit streams over the corpus chunk by chunk. Each chunk is counted exactly with numpy.unique and merged into a
+  Misra-Gries summary of `capacity` counters (the mergeable form of the Space-Saving heavy-hitter sketch, Agarwal et
+  al. 2012), so memory stays bounded whatever the corpus size and the count of an n-gram is underestimated by at most
+  N / (capacity + 1) for N n-grams seen.
+- transform encodes the n-grams of every distinct word of a TokenTable at once and finds their columns with a binary
+  search over the sorted keys of the vocabulary, instead of comparing against every entry.
+"""
+
+import re
+import numpy as np
+from scipy.sparse import csr_matrix
+
+# bits per code point of a packed n-gram key
+CODE_POINT_BITS = 21
+MAX_N = 63 // CODE_POINT_BITS
+# letter runs of a raw text as seen by fit, an approximation of spaCy's word tokens without digits and underscores
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+
+class NgramVocabulary(object):
+    """NgramVocabulary
+
+    A vocabulary of character n-grams counted within words.
+
+    Known differences with the extractors' word tokens: fit splits raw texts into runs of letters with the regular
+    expression '[^\\W\\d_]+' rather than parsing them with spaCy, so n-grams spanning apostrophes or hyphens (e.g.
+    "n't") are not learned, and neither are n-grams with digits or underscores, as the letter n-grams of the Brown
+    Corpus lists have none.
+
+    Attributes:
+        n: Length of the n-grams, at most MAX_N.
+        size: Number of n-grams to learn.
+        capacity: Number of counters of the heavy-hitter summary, 10 * size by default.
+        chunk_size: Number of texts counted exactly before they are merged into the summary.
+        ngrams_: The learned n-grams, most frequent first.
+    """
+
+    def __init__(self, n=2, size=100, capacity=None, chunk_size=1000):
+        """Initiates NgramVocabulary.
+
+        Raises:
+            ValueError: an error if n is out of range.
+        """
+        if not 1 <= n <= MAX_N:
+            raise ValueError(f"""n between 1 and {MAX_N} expected, {n} received.""")
+        self.n = n
+        self.size = size
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self.ngrams_ = None
+        self._reset()
+
+    @classmethod
+    def from_ngrams(cls, ngrams):
+        """Returns a vocabulary of the given n-grams, all of the same length, in the given order."""
+        vocabulary = cls(len(ngrams[0]), len(ngrams))
+        vocabulary._set(_encode(list(ngrams), vocabulary.n)[0])
+        return vocabulary
+
+    def fit(self, input):
+        """Learns the most frequent n-grams of a corpus, streaming over it.
+
+        Args:
+            input: An iterable of raw texts, consumed once.
+
+        Returns:
+            self.
+        """
+        self._reset()
+        chunk = []
+        for raw in input:
+            chunk.append(raw)
+            if len(chunk) == self.chunk_size:
+                self.partial_fit(chunk)
+                chunk = []
+        if chunk or self.ngrams_ is None:
+            self.partial_fit(chunk)
+        return self
+
+    def partial_fit(self, input):
+        """Merges the n-gram counts of a chunk of raw texts into the summary and updates ngrams_.
+
+        Args:
+            input: A list of raw texts.
+
+        Returns:
+            self.
+        """
+        words = [word for raw in input for word in WORD_PATTERN.findall(raw.lower())]
+        keys, counts = np.unique(_encode(words, self.n)[0], return_counts=True)
+        keys, inverse = np.unique(
+            np.concatenate([self._keys, keys]), return_inverse=True
+        )
+        counts = np.bincount(inverse, np.concatenate([self._counts, counts])).astype(
+            np.int64
+        )
+        capacity = self.capacity or 10 * self.size
+        if len(keys) > capacity:
+            # Misra-Gries merge: drop all but the capacity largest counters, less the first count dropped
+            threshold = np.partition(counts, len(counts) - capacity - 1)[
+                len(counts) - capacity - 1
+            ]
+            counts = counts - threshold
+            keys, counts = keys[counts > 0], counts[counts > 0]
+        self._keys, self._counts = keys, counts
+        # most frequent first, ties broken by key for reproducibility
+        order = np.lexsort((keys, -counts))[: self.size]
+        self._set(keys[order])
+        return self
+
+    def transform(self, word_tokens):
+        """Counts the vocabulary's n-grams within the words of every document.
+
+        Args:
+            word_tokens: A TokenTable of word tokens.
+
+        Returns:
+            An int64 array of shape (n_docs, len(ngrams_)).
+        """
+        if not len(self._sorted_keys):
+            # nothing learned, e.g. from a corpus without words of n letters
+            return np.zeros((len(word_tokens), 0), dtype=np.int64)
+        keys, words = _encode(word_tokens.vocab, self.n)
+        positions = np.searchsorted(self._sorted_keys, keys)
+        positions[positions == len(self._sorted_keys)] = 0
+        known = self._sorted_keys[positions] == keys
+        columns = self._sorted_columns[positions[known]]
+        occurrences = csr_matrix(
+            (np.ones(len(columns), dtype=np.int64), (words[known], columns)),
+            shape=(len(word_tokens.vocab), len(self.ngrams_)),
+        )
+        return (word_tokens.counts() @ occurrences).toarray()
+
+    def _reset(self):
+        """Forgets the summary."""
+        self._keys = np.zeros(0, dtype=np.int64)
+        self._counts = np.zeros(0, dtype=np.int64)
+
+    def _set(self, keys):
+        """Sets ngrams_ and the binary search tables from packed keys in column order."""
+        self.ngrams_ = [_decode(key, self.n) for key in keys.tolist()]
+        order = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[order]
+        self._sorted_columns = order
+
+
+def _encode(words, n):
+    """Packs every character n-gram within words into an int64 key.
+
+    Returns:
+        A tuple of the keys and the index in words of the word each n-gram comes from.
+    """
+    # words are joined with NUL, which never occurs in a word token, and n-grams across a NUL are dropped
+    chars = np.frombuffer("\0".join(words).encode("utf-32-le"), dtype=np.uint32).astype(
+        np.int64
+    )
+    if len(chars) < n:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    separators = np.concatenate([[0], np.cumsum(chars == 0)])
+    starts = np.arange(len(chars) - n + 1)
+    keys = np.zeros(len(starts), dtype=np.int64)
+    for i in range(n):
+        keys = (keys << CODE_POINT_BITS) | chars[i : i + len(starts)]
+    within = separators[starts + n] == separators[starts]
+    return keys[within], separators[starts[within]]
+
+
+def _decode(key, n):
+    """Unpacks an n-gram key."""
+    mask = (1 << CODE_POINT_BITS) - 1
+    return "".join(
+        chr((key >> (CODE_POINT_BITS * (n - 1 - i))) & mask) for i in range(n)
+    )
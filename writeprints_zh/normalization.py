@@ -0,0 +1,222 @@
+"""This module is used to hold the WriteprintsNormalizer class.
+
+The raw Writeprints Static columns are counts which grow with the length of the document. WriteprintsNormalizer turns
+them into per-word or per-character rates, scales every column to unit variance, and weights the function word and
+n-gram blocks by inverse document frequency. Statistics are accumulated online over chunks of
+WriteprintsStatic.iter_transform output, and the transform is applied in place on the data array of a
+scipy.sparse.csr_matrix, so the dense matrix is never materialized.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+
+# features which are already ratios, and so are never turned into rates
+RATIO_FEATURES = [
+    "avg_word_length",
+    "digits_ratio",
+    "uppercase_ratio",
+    "hapax_legomena_ratio",
+    "dis_legomena_ratio",
+]
+# features used as denominators of the rates, which are left as they are
+LENGTH_FEATURES = {"words": "total_words", "chars": "total_chars"}
+# blocks weighted by inverse document frequency
+TFIDF_PREFIXES = ("function_word_", "bigram_", "trigram_")
+
+
+class WriteprintsNormalizer(object):
+    """WriteprintsNormalizer
+
+    Normalizes WriteprintsStatic output in three optional steps, in this order: rates, standardization, and tf-idf.
+
+    tf-idf multiplies the function word and n-gram columns by their idf and then scales these columns of every row to
+    unit L2 norm, as tf-idf usually does. The row normalization is what gives the weights an effect after
+    standardization, since a per-column weight alone would only rescale a column already scaled to unit variance.
+
+    Standardization only divides by the standard deviation, the mean is not subtracted, so that zeros stay zeros and
+    the output stays sparse (cf. scikit-learn's StandardScaler(with_mean=False)). NaN values, e.g. ratios of documents
+    without word tokens, are ignored when accumulating statistics and are left as they are.
+
+    Attributes:
+        vectorizer: A WriteprintsStatic instance used to featurize raw texts and name the columns.
+        rate: "words" to divide count features by total_words, "chars" to divide them by total_chars, or None.
+        tfidf: Whether to weight the function word and n-gram blocks by smoothed inverse document frequency and scale
+            them to unit L2 norm per row.
+        standardize: Whether to scale every column to unit variance.
+        n_samples_seen_: Number of non-NaN values seen per column.
+        mean_: Running mean per column, after rates and before tf-idf.
+        var_: Running variance per column, after rates and before tf-idf.
+        df_: Number of documents with a positive value per column.
+        idf_: Inverse document frequency per column, one outside the tf-idf blocks.
+        scale_: Per-column divisor applied by standardization, the standard deviation of the rates.
+    """
+
+    def __init__(self, vectorizer, rate="words", tfidf=False, standardize=True):
+        """Initiates WriteprintsNormalizer."""
+        self.vectorizer = vectorizer
+        self.rate = rate
+        self.tfidf = tfidf
+        self.standardize = standardize
+        self._reset()
+
+    def fit(self, input):
+        """Fits the statistics on raw texts, streaming over vectorizer.iter_transform.
+
+        Args:
+            input: A list of English raw texts (in string type).
+
+        Returns:
+            self.
+        """
+        self._reset()
+        for X in self.vectorizer.iter_transform(input):
+            self.partial_fit(X)
+        return self
+
+    def partial_fit(self, X):
+        """Updates the statistics with a chunk of WriteprintsStatic output.
+
+        Means and variances are merged chunk by chunk (Chan et al. 1979), so chunks can be of any size.
+
+        Args:
+            X: A scipy.sparse.csr_matrix instance of raw WriteprintsStatic values.
+
+        Returns:
+            self.
+        """
+        X = self._rates(csr_matrix(X, dtype=np.float64, copy=True))
+        n_features = X.shape[1]
+        if self.n_samples_seen_ is None:
+            self.n_samples_seen_ = np.zeros(n_features, dtype=np.int64)
+            self.mean_ = np.zeros(n_features)
+            self.var_ = np.zeros(n_features)
+            self.df_ = np.zeros(n_features, dtype=np.int64)
+
+        nan = np.isnan(X.data)
+        count = X.shape[0] - np.bincount(X.indices[nan], minlength=n_features)
+        X.data[nan] = 0
+        self.df_ += np.bincount(X.indices[X.data > 0], minlength=n_features)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = np.asarray(X.sum(axis=0)).ravel() / count
+            var = np.asarray(X.multiply(X).sum(axis=0)).ravel() / count - mean**2
+        mean[count == 0] = 0
+        var[count == 0] = 0
+
+        total = self.n_samples_seen_ + count
+        with np.errstate(divide="ignore", invalid="ignore"):
+            delta = mean - self.mean_
+            merged_mean = self.mean_ + delta * count / total
+            merged_var = (
+                self.var_ * self.n_samples_seen_
+                + var * count
+                + delta**2 * self.n_samples_seen_ * count / total
+            ) / total
+        seen = total > 0
+        self.mean_[seen] = merged_mean[seen]
+        self.var_[seen] = np.maximum(merged_var[seen], 0)
+        self.n_samples_seen_ = total
+        self._finalize()
+        return self
+
+    def transform(self, X, copy=True):
+        """Normalizes WriteprintsStatic output.
+
+        Args:
+            X: A scipy.sparse.csr_matrix instance of raw WriteprintsStatic values.
+            copy: If False and X is a float64 csr_matrix, X is normalized in place.
+
+        Returns:
+            A scipy.sparse.csr_matrix instance of normalized values.
+
+        Raises:
+            ValueError: an error if the normalizer has not been fitted.
+        """
+        if self.scale_ is None:
+            raise ValueError("""Call fit or partial_fit before transform.""")
+        X = self._rates(csr_matrix(X, dtype=np.float64, copy=copy))
+        X.data *= (self.idf_ / self.scale_)[X.indices]
+        if self.tfidf:
+            weighted = self._weighted[X.indices]
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            norms = np.sqrt(
+                np.bincount(
+                    rows[weighted],
+                    weights=X.data[weighted] ** 2,
+                    minlength=X.shape[0],
+                )
+            )
+            # rows without any weighted value are left as they are
+            norms[norms == 0] = 1
+            X.data[weighted] /= norms[rows[weighted]]
+        return X
+
+    def iter_transform(self, input):
+        """Featurizes and normalizes raw texts chunk by chunk with a fitted normalizer.
+
+        Args:
+            input: A list of English raw texts (in string type).
+
+        Yields:
+            A normalized scipy.sparse.csr_matrix instance per vectorizer batch.
+        """
+        for X in self.vectorizer.iter_transform(input):
+            yield self.transform(X, copy=False)
+
+    def fit_transform(self, input):
+        """Fits on raw texts and returns their normalized values.
+
+        The raw chunks are kept (sparse) until fitting is done, so the texts are parsed only once.
+        """
+        self._reset()
+        chunks = list(self.vectorizer.iter_transform(input))
+        for X in chunks:
+            self.partial_fit(X)
+        return vstack([self.transform(X, copy=False) for X in chunks], format="csr")
+
+    def _reset(self):
+        """Forgets the fitted statistics."""
+        self.n_samples_seen_ = None
+        self.mean_ = None
+        self.var_ = None
+        self.df_ = None
+        self.idf_ = None
+        self.scale_ = None
+        self._weighted = None
+
+    def _finalize(self):
+        """Derives idf_ and scale_ from the accumulated statistics."""
+        feature_names = self.vectorizer.get_feature_names()
+        n_features = len(self.mean_)
+        self.idf_ = np.ones(n_features)
+        self._weighted = np.array(
+            [name.startswith(TFIDF_PREFIXES) for name in feature_names]
+        )
+        if self.tfidf:
+            idf = np.log((1 + self.n_samples_seen_) / (1 + self.df_)) + 1
+            self.idf_[self._weighted] = idf[self._weighted]
+        self.scale_ = np.ones(n_features)
+        if self.standardize:
+            std = np.sqrt(self.var_)
+            # constant columns are left unscaled
+            self.scale_[std > 0] = std[std > 0]
+
+    def _rates(self, X):
+        """Divides the count columns of a float64 csr_matrix by the rate denominator, in place."""
+        if self.rate is None:
+            return X
+        if self.rate not in LENGTH_FEATURES:
+            raise ValueError(
+                f"""Unknown rate {self.rate!r}, expected any of {list(LENGTH_FEATURES)} or None."""
+            )
+        feature_names = self.vectorizer.get_feature_names()
+        skipped = set(RATIO_FEATURES).union(LENGTH_FEATURES.values())
+        counted = np.array([name not in skipped for name in feature_names])
+        denominator = (
+            X[:, feature_names.index(LENGTH_FEATURES[self.rate])].toarray().ravel()
+        )
+        # empty documents are left as they are
+        denominator[(denominator == 0) | np.isnan(denominator)] = 1
+        rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+        selected = counted[X.indices]
+        X.data[selected] /= denominator[rows[selected]]
+        return X
@@ -0,0 +1,225 @@
+"""This module is used to compute all-pairs distances between Writeprints Static vectors within a memory budget.
+
+Authorship verification and clustering need the distance between every pair of documents of a corpus, which is far
+too large to hold for 100k+ documents. Here the distance matrix is only ever materialized one tile at a time: rows are
+split into bands, each band is densified and scored against the columns tile by tile, and reduced on the spot to its
+k nearest neighbors or to the pairs under a distance threshold. Tile sizes are derived from `memory_budget`, bands are
+spread over `n_jobs` threads (BLAS and numpy reductions release the GIL), and results can be streamed to disk band by
+band.
+"""
+
+import math
+import os
+import numpy as np
+from joblib import Parallel, delayed, effective_n_jobs
+from scipy.sparse import issparse
+from writeprints_static import metrics
+
+# record of a pair under the threshold
+EDGE_DTYPE = np.dtype([("row", np.int64), ("col", np.int64), ("distance", np.float32)])
+
+
+def pairwise_top_k(
+    X, Y=None, k=10, metric="cosine", memory_budget=2**30, n_jobs=None, path=None
+):
+    """Finds the k nearest columns of every row.
+
+    Args:
+        X: WriteprintsStatic output, a scipy.sparse matrix or an array of shape (n, n_features).
+        Y: As X, of shape (m, n_features). If None, X is compared with itself and a row is never its own neighbor.
+        k: Number of neighbors.
+        metric: Any of metrics.METRICS.
+        memory_budget: Upper bound in bytes of the working memory, shared by all workers.
+        n_jobs: Number of threads, None for one, -1 for all cores.
+        path: If given, a directory the results are written to band by band as distances.npy and indices.npy, which
+            are returned memory-mapped.
+
+    Returns:
+        A tuple of two arrays of shape (n, k), distances sorted ascending and the row indices into Y of the neighbors.
+    """
+    tiles = _Tiles(X, Y, metric, memory_budget, n_jobs)
+    k = min(k, tiles.Y.shape[0] - (Y is None))
+    shape = (tiles.X.shape[0], k)
+    if path is None:
+        distances = np.empty(shape, dtype=np.float32)
+        indices = np.empty(shape, dtype=np.int64)
+    else:
+        os.makedirs(path, exist_ok=True)
+        distances = np.lib.format.open_memmap(
+            os.path.join(path, "distances.npy"), "w+", np.float32, shape
+        )
+        indices = np.lib.format.open_memmap(
+            os.path.join(path, "indices.npy"), "w+", np.int64, shape
+        )
+    for start, (band_distances, band_indices) in tiles.map(_band_top_k, k):
+        distances[start : start + len(band_distances)] = band_distances
+        indices[start : start + len(band_indices)] = band_indices
+    if path is not None:
+        distances.flush()
+        indices.flush()
+    return distances, indices
+
+
+def pairwise_threshold(
+    X,
+    Y=None,
+    threshold=0.1,
+    metric="cosine",
+    memory_budget=2**30,
+    n_jobs=None,
+    path=None,
+):
+    """Finds every pair at distance at most threshold.
+
+    Args:
+        X: WriteprintsStatic output, a scipy.sparse matrix or an array of shape (n, n_features).
+        Y: As X, of shape (m, n_features). If None, X is compared with itself and only pairs with row < col are kept.
+        threshold: The largest distance kept.
+        metric: Any of metrics.METRICS.
+        memory_budget: Upper bound in bytes of the working memory, shared by all workers.
+        n_jobs: Number of threads, None for one, -1 for all cores.
+        path: If given, a file the pairs are appended to band by band, and which is returned memory-mapped, see
+            read_edges.
+
+    Returns:
+        A structured array of EDGE_DTYPE records sorted by row, then col.
+    """
+    tiles = _Tiles(X, Y, metric, memory_budget, n_jobs)
+    if path is None:
+        return np.concatenate(
+            [np.zeros(0, dtype=EDGE_DTYPE)]
+            + [edges for _, edges in tiles.map(_band_threshold, threshold)]
+        )
+    with open(path, "wb") as f:
+        for _, edges in tiles.map(_band_threshold, threshold):
+            edges.tofile(f)
+    return read_edges(path)
+
+
+def read_edges(path):
+    """Memory-maps a file of pairs written by pairwise_threshold."""
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=EDGE_DTYPE)
+    return np.memmap(path, dtype=EDGE_DTYPE, mode="r")
+
+
+class _Tiles(object):
+    """Splits a pairwise computation into bands of rows and tiles of columns sized to a memory budget."""
+
+    def __init__(self, X, Y, metric, memory_budget, n_jobs):
+        if metric not in metrics.METRICS:
+            raise ValueError(
+                f"""Unknown metric {metric!r}, expected any of {list(metrics.METRICS)}."""
+            )
+        self.X = X.tocsr() if issparse(X) else np.asarray(X)
+        self.Y = self.X if Y is None else (Y.tocsr() if issparse(Y) else np.asarray(Y))
+        self.symmetric = Y is None
+        self.metric = metric
+        self.n_jobs = n_jobs
+        workers = effective_n_jobs(n_jobs)
+        # half of a worker's share goes to the broadcast intermediate of non-BLAS metrics, the other half to the
+        # densified band and tile (8 * size * d bytes) and a few distance tiles (12 * size ** 2 bytes)
+        budget = memory_budget // workers
+        self.working_memory = budget // 2
+        d = self.X.shape[1]
+        self.size = max(1, int((-8 * d + math.sqrt(64 * d**2 + 24 * budget)) / 24))
+        self.mean, self.std = None, None
+        if metric == "delta":
+            self.mean, self.std = _moments(
+                self.X if self.symmetric else (self.X, self.Y)
+            )
+
+    def map(self, function, *args):
+        """Runs function(self, start, stop, *args) over row bands, yielding (start, result) in row order."""
+        starts = range(0, self.X.shape[0], self.size)
+        results = Parallel(n_jobs=self.n_jobs, prefer="threads", return_as="generator")(
+            delayed(function)(
+                self, start, min(start + self.size, self.X.shape[0]), *args
+            )
+            for start in starts
+        )
+        return zip(starts, results)
+
+    def columns(self, start, stop):
+        """Yields (col_start, distances) for the band of rows [start, stop) against every column tile."""
+        band = _dense(self.X, start, stop)
+        band_norms = metrics.row_norms(band)
+        for col in range(0, self.Y.shape[0], self.size):
+            tile = _dense(self.Y, col, min(col + self.size, self.Y.shape[0]))
+            yield col, metrics.distances(
+                band,
+                tile,
+                self.metric,
+                band_norms,
+                metrics.row_norms(tile),
+                self.mean,
+                self.std,
+                self.working_memory,
+            )
+
+
+def _band_top_k(tiles, start, stop, k):
+    """Reduces a band of rows to its k nearest columns."""
+    best_distances = np.zeros((stop - start, 0), dtype=np.float32)
+    best_indices = np.zeros((stop - start, 0), dtype=np.int64)
+    for col, distances in tiles.columns(start, stop):
+        if tiles.symmetric:
+            _mask_diagonal(distances, start, col, np.inf)
+        best_distances, best_indices = metrics.merge_top_k(
+            best_distances, best_indices, distances, col, k
+        )
+    return metrics.sort_top_k(best_distances, best_indices)
+
+
+def _band_threshold(tiles, start, stop, threshold):
+    """Reduces a band of rows to its pairs at distance at most threshold."""
+    edges = []
+    for col, distances in tiles.columns(start, stop):
+        close = distances <= threshold
+        if tiles.symmetric:
+            rows = np.arange(start, stop)[:, None]
+            close &= rows < np.arange(col, col + distances.shape[1])[None, :]
+        rows, cols = np.nonzero(close)
+        tile_edges = np.empty(len(rows), dtype=EDGE_DTYPE)
+        tile_edges["row"] = rows + start
+        tile_edges["col"] = cols + col
+        tile_edges["distance"] = distances[rows, cols]
+        edges.append(tile_edges)
+    edges = np.concatenate(edges)
+    return edges[np.lexsort((edges["col"], edges["row"]))]
+
+
+def _mask_diagonal(distances, start, col, value):
+    """Sets the distances of a tile at rows [start, ...) and columns [col, ...) between a row and itself to value."""
+    first, last = max(start, col), min(
+        start + distances.shape[0], col + distances.shape[1]
+    )
+    if first < last:
+        diagonal = np.arange(first, last)
+        distances[diagonal - start, diagonal - col] = value
+
+
+def _dense(X, start, stop):
+    """Returns rows [start, stop) of X as a dense float32 array."""
+    rows = X[start:stop]
+    return (rows.toarray() if issparse(rows) else rows).astype(np.float32)
+
+
+def _moments(X):
+    """Returns the per-column mean and standard deviation of a matrix, or of a tuple of matrices stacked."""
+    matrices = X if isinstance(X, tuple) else (X,)
+    n = sum(matrix.shape[0] for matrix in matrices)
+    sums = sum(
+        np.asarray(matrix.sum(axis=0), dtype=np.float64).ravel() for matrix in matrices
+    )
+    squares = sum(
+        np.asarray(
+            (matrix.multiply(matrix) if issparse(matrix) else np.square(matrix)).sum(
+                axis=0
+            ),
+            dtype=np.float64,
+        ).ravel()
+        for matrix in matrices
+    )
+    mean = sums / n
+    return mean, np.sqrt(np.maximum(squares / n - mean**2, 0))
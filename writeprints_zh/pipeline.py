@@ -0,0 +1,379 @@
+"""This module is used to hold the Pipeline class, a staged executor of WriteprintsStatic.
+
+transform runs its phases one after the other over a whole batch, so the CPU idles while documents are read and
+rows are written, and memory peaks once everything is parsed. Pipeline runs them as stages connected by bounded
+queues, every stage with its own worker threads:
+
+- read: draws documents from any iterable (e.g. readers.read_jsonl), screens them, and groups them into batches of
+  `batch_size`;
+- parse: runs spaCy over a batch, every worker with pipelines of its own (see models.ModelPool);
+- extract: runs the extractors and builds the rows of a batch;
+- write: puts batches back in stream order and hands them to the caller, or to an export writer.
+
+A batch taken by the read stage holds a slot until it is written, and there are `max_in_flight` slots, so memory
+stays flat whatever the size of the corpus. Every stage records how long its workers were busy and how deep its input
+queue was, see Pipeline.stats.
+
+Workers are threads. Reading, decompression, and writing release the GIL, and so do parts of spaCy and numpy, but
+Python code does not run in parallel: to parse on several cores, run several processes, see sharding.
+"""
+
+import itertools
+import threading
+import time
+from queue import Empty, Full, Queue
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from writeprints_static import base, models
+from writeprints_static.export import open_writer
+
+STAGES = ("read", "parse", "extract", "write")
+# marks the end of the stream in a queue
+_END = object()
+
+
+class Pipeline(object):
+    """Pipeline
+
+    Featurizes a stream of raw texts with the read, parse, extract, and write stages running concurrently.
+
+    Attributes:
+        vectorizer: A WriteprintsStatic instance, fitted if it learns n-grams. Its batch_size, model, router,
+            max_models, deduplicate, errors, and fill_value apply; retain, n_jobs, and memory_budget do not.
+        n_parsers: Number of parse workers.
+        n_extractors: Number of extract workers.
+        queue_size: Number of batches every queue between two stages holds at most.
+        max_in_flight: Number of batches read but not written yet at most, by default enough to keep every worker and
+            queue busy.
+        valid_mask_: A boolean array of the validity of the documents run so far, see WriteprintsStatic.transform.
+    """
+
+    def __init__(
+        self, vectorizer, n_parsers=1, n_extractors=1, queue_size=2, max_in_flight=None
+    ):
+        """Initiates Pipeline."""
+        self.vectorizer = vectorizer
+        self.n_parsers = n_parsers
+        self.n_extractors = n_extractors
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+        self.valid_mask_ = np.zeros(0, dtype=bool)
+        self._run = None
+        self._stats = {stage: _StageStats() for stage in STAGES}
+        self._started = None
+        self._finished = None
+
+    def iter_transform(self, documents):
+        """Generates values batch by batch.
+
+        Args:
+            documents: An iterable of raw texts (in string type).
+
+        Yields:
+            A scipy.sparse.csr_matrix instance per batch, rows in stream order. With errors="skip", the rows of invalid
+            documents are left out.
+
+        Raises:
+            ValueError: an error if the errors policy is unknown, or, with errors="raise", if a document is not a
+                non-blank string of at most 10,000,000 characters or has no word token.
+        """
+        vectorizer = self.vectorizer
+        if vectorizer.errors not in base.ERRORS:
+            raise ValueError(
+                f"""Unknown errors policy {vectorizer.errors!r}, expected any of {list(base.ERRORS)}."""
+            )
+        vectorizer.feature_names_ = vectorizer.get_feature_names()
+        self._run = _Run(
+            self.queue_size,
+            self.max_in_flight
+            or 2 * self.queue_size + self.n_parsers + self.n_extractors + 1,
+        )
+        self._stats = {stage: _StageStats() for stage in STAGES}
+        self._stats["read"].workers = 1
+        self._stats["parse"].workers = self.n_parsers
+        self._stats["extract"].workers = self.n_extractors
+        self._stats["write"].workers = 1
+        self._started, self._finished = time.perf_counter(), None
+        self.valid_mask_ = np.zeros(0, dtype=bool)
+
+        run = self._run
+        threads = [threading.Thread(target=self._read, args=(documents,))]
+        threads += [
+            threading.Thread(target=self._parse, args=(models.ModelPool(),))
+            for _ in range(self.n_parsers)
+        ]
+        threads += [
+            threading.Thread(target=self._extract) for _ in range(self.n_extractors)
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        try:
+            yield from self._write()
+        finally:
+            run.stop.set()
+            self._finished = time.perf_counter()
+        for thread in threads:
+            thread.join()
+
+    def transform(self, documents):
+        """Returns the rows of all documents as one scipy.sparse.csr_matrix instance, see iter_transform."""
+        batches = list(self.iter_transform(documents))
+        if not batches:
+            return csr_matrix((0, len(self.vectorizer.get_feature_names())))
+        return vstack(batches, format="csr")
+
+    def export(self, documents, path, format="npy"):
+        """Writes the rows of all documents as they are produced, see export.export.
+
+        Returns:
+            The number of rows written.
+        """
+        feature_names = self.vectorizer.get_feature_names()
+        with open_writer(path, feature_names, format) as writer:
+            for X in self.iter_transform(documents):
+                writer.write(X)
+        return writer.n_rows
+
+    def stats(self):
+        """Returns the statistics of every stage of the current or last run, by stage name.
+
+        Every stage has its number of workers, the batches it processed, the seconds its workers were busy, its
+        utilization (busy time over the time its workers were available, from 0 to 1), and the mean and maximum
+        number of batches waiting in its input queue when a worker took one. A stage close to full utilization with a
+        deep input queue is the bottleneck; give it more workers.
+        """
+        if self._started is None:
+            elapsed = 0.0
+        else:
+            elapsed = (self._finished or time.perf_counter()) - self._started
+        return {stage: stats.summary(elapsed) for stage, stats in self._stats.items()}
+
+    def report(self):
+        """Returns the statistics of every stage as a text table, see stats."""
+        lines = [
+            f"""{"stage":<8}{"workers":>8}{"batches":>9}{"busy (s)":>10}{"util.":>7}{"queue":>7}{"max":>5}"""
+        ]
+        for stage, stats in self.stats().items():
+            lines.append(
+                f"""{stage:<8}{stats["workers"]:>8}{stats["batches"]:>9}{stats["busy"]:>10.2f}"""
+                f"""{stats["utilization"]:>7.0%}{stats["mean_queue_depth"]:>7.1f}{stats["max_queue_depth"]:>5}"""
+            )
+        return "\n".join(lines)
+
+    def _read(self, documents):
+        """The read stage: screens documents and puts batches of them on the parse queue."""
+        run, stats = self._run, self._stats["read"]
+        vectorizer = self.vectorizer
+        try:
+            batch, index = [], 0
+            iterator = iter(documents)
+            for position in itertools.count():
+                # the time spent waiting for a free slot is idle time
+                if not batch and not run.acquire():
+                    return
+                start = time.perf_counter()
+                raw = next(iterator, _END)
+                if raw is _END:
+                    if batch:
+                        run.put(run.parse, (index, batch))
+                        stats.batches += 1
+                    else:
+                        # the slot taken for a batch which turned out empty
+                        run.release()
+                    stats.busy += time.perf_counter() - start
+                    for _ in range(self.n_parsers):
+                        run.put(run.parse, _END)
+                    return
+                if not base._usable(raw):
+                    if vectorizer.errors == "raise":
+                        raise ValueError(
+                            f"""Raw text document of 1 to 10,000,000 non-blank characters expected, {raw!r:.80} received at position {position}."""
+                        )
+                    raw = None
+                batch.append(raw)
+                stats.busy += time.perf_counter() - start
+                if len(batch) == vectorizer.batch_size:
+                    if not run.put(run.parse, (index, batch)):
+                        return
+                    stats.batches += 1
+                    batch, index = [], index + 1
+        except BaseException as error:
+            run.fail(error)
+
+    def _parse(self, pool):
+        """A parse worker: parses the batches of the parse queue and puts them on the extract queue."""
+        run, stats = self._run, self._stats["parse"]
+        vectorizer = self.vectorizer
+        try:
+            while True:
+                item = run.get(run.parse, stats)
+                if item is None:
+                    return
+                if item is _END:
+                    if run.done("parse", self.n_parsers):
+                        for _ in range(self.n_extractors):
+                            run.put(run.extract, _END)
+                    return
+                start = time.perf_counter()
+                index, raws = item
+                valid, positions, raws, inverse = base._prepare(
+                    raws, vectorizer.deduplicate
+                )
+                max_length = max(1000000, round(max(map(len, raws), default=0) * 1.1))
+                _, word_tokens, tags = base._parse(
+                    vectorizer.model,
+                    max_length,
+                    raws,
+                    vectorizer.router,
+                    vectorizer.max_models,
+                    pool,
+                )
+                stats.busy += time.perf_counter() - start
+                stats.batches += 1
+                if not run.put(
+                    run.extract,
+                    (index, (raws, word_tokens, tags, valid, positions, inverse)),
+                ):
+                    return
+        except BaseException as error:
+            run.fail(error)
+
+    def _extract(self):
+        """An extract worker: builds the rows of the batches of the extract queue and puts them on the write queue."""
+        run, stats = self._run, self._stats["extract"]
+        vectorizer = self.vectorizer
+        vocabularies = vectorizer._vocabularies()
+        fill_value = np.nan if vectorizer.fill_value is None else vectorizer.fill_value
+        try:
+            while True:
+                item = run.get(run.extract, stats)
+                if item is None:
+                    return
+                if item is _END:
+                    if run.done("extract", self.n_extractors):
+                        run.put(run.write, _END)
+                    return
+                start = time.perf_counter()
+                index, (raws, word_tokens, tags, valid, positions, inverse) = item
+                values = base._values(raws, word_tokens, tags, vocabularies)
+                rows, valid = base._assemble(
+                    values,
+                    raws,
+                    word_tokens,
+                    valid,
+                    positions,
+                    inverse,
+                    vectorizer.errors == "raise",
+                    fill_value,
+                )
+                stats.busy += time.perf_counter() - start
+                stats.batches += 1
+                if not run.put(run.write, (index, (rows, valid))):
+                    return
+        except BaseException as error:
+            run.fail(error)
+
+    def _write(self):
+        """The write stage: yields the batches of the write queue in stream order, releasing their slots."""
+        run, stats = self._run, self._stats["write"]
+        pending, next_index = {}, 0
+        while True:
+            item = run.get(run.write, stats)
+            if item is None:
+                raise run.error
+            if item is not _END:
+                index, batch = item
+                pending[index] = batch
+            while next_index in pending:
+                rows, valid = pending.pop(next_index)
+                next_index += 1
+                start = time.perf_counter()
+                self.valid_mask_ = np.concatenate([self.valid_mask_, valid])
+                # the caller consumes the batch during the yield, which is the work of this stage
+                yield rows[valid] if self.vectorizer.errors == "skip" else rows
+                stats.busy += time.perf_counter() - start
+                stats.batches += 1
+                run.release()
+            if item is _END:
+                return
+
+
+class _StageStats(object):
+    """The busy time, batch count, and input queue depths of a stage."""
+
+    def __init__(self):
+        self.workers = 0
+        self.batches = 0
+        self.busy = 0.0
+        self.depths = []
+
+    def summary(self, elapsed):
+        """Returns the statistics of the stage over elapsed seconds, see Pipeline.stats."""
+        available = elapsed * self.workers
+        return {
+            "workers": self.workers,
+            "batches": self.batches,
+            "busy": self.busy,
+            "utilization": min(1.0, self.busy / available) if available else 0.0,
+            "mean_queue_depth": float(np.mean(self.depths)) if self.depths else 0.0,
+            "max_queue_depth": max(self.depths, default=0),
+        }
+
+
+class _Run(object):
+    """The queues, slots, and failure state shared by the workers of a run."""
+
+    def __init__(self, queue_size, max_in_flight):
+        self.parse = Queue(queue_size)
+        self.extract = Queue(queue_size)
+        self.write = Queue()
+        self.slots = threading.Semaphore(max_in_flight)
+        self.stop = threading.Event()
+        self.error = None
+        self._finished = {"parse": 0, "extract": 0}
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Takes a slot for a new batch, returns False if the run stopped first."""
+        while not self.stop.is_set():
+            if self.slots.acquire(timeout=0.1):
+                return True
+        return False
+
+    def release(self):
+        """Frees the slot of a written batch."""
+        self.slots.release()
+
+    def put(self, queue, item):
+        """Puts an item on a queue, returns False if the run stopped first."""
+        while not self.stop.is_set():
+            try:
+                queue.put(item, timeout=0.1)
+                return True
+            except Full:
+                continue
+        return False
+
+    def get(self, queue, stats):
+        """Takes an item from a queue, recording its depth, returns None if the run stopped first."""
+        stats.depths.append(queue.qsize())
+        while not self.stop.is_set():
+            try:
+                return queue.get(timeout=0.1)
+            except Empty:
+                continue
+        return None
+
+    def done(self, stage, n_workers):
+        """Records that a worker of a stage saw the end of the stream, returns whether it was the last one."""
+        with self._lock:
+            self._finished[stage] += 1
+            return self._finished[stage] == n_workers
+
+    def fail(self, error):
+        """Stops the run, keeping the first error for the caller."""
+        with self._lock:
+            if self.error is None:
+                self.error = error
+        self.stop.set()
@@ -0,0 +1,205 @@
+"""This module is used to hold the AuthorProfiles class.
+
+An author profile is the document count, the mean, and the sum of squared deviations of the Writeprints Static vectors
+of an author's documents. New documents are merged into the profiles with the parallel update of Chan et al. (1979), so
+keeping profiles current costs O(new documents) rather than a pass over each author's full history. All profiles are
+scored against a batch of documents at once with the metrics module.
+"""
+
+import numpy as np
+from scipy.sparse import csr_matrix, issparse
+from writeprints_static import metrics
+
+
+class AuthorProfiles(object):
+    """AuthorProfiles
+
+    Running per-author statistics of Writeprints Static vectors.
+
+    Attributes:
+        vectorizer: A WriteprintsStatic instance used by update_texts.
+        normalizer: An optional fitted WriteprintsNormalizer applied to vectors before they are accumulated or scored.
+        authors_: A list of author labels, one per profile.
+        counts_: Number of documents per profile, an int64 array of shape (n_authors,).
+        means_: Mean vector per profile, a float64 array of shape (n_authors, n_features).
+        m2_: Sum of squared deviations from the mean per profile, same shape as means_.
+    """
+
+    def __init__(self, vectorizer=None, normalizer=None):
+        """Initiates AuthorProfiles."""
+        self.vectorizer = vectorizer
+        self.normalizer = normalizer
+        self.authors_ = []
+        self._counts = None
+        self._means = None
+        self._m2 = None
+        self._positions = {}
+
+    def __len__(self):
+        """Returns the number of profiles."""
+        return len(self.authors_)
+
+    @property
+    def counts_(self):
+        """Number of documents per profile, an int64 array of shape (n_authors,)."""
+        return None if self._counts is None else self._counts[: len(self)]
+
+    @property
+    def means_(self):
+        """Mean vector per profile, a float64 array of shape (n_authors, n_features)."""
+        return None if self._means is None else self._means[: len(self)]
+
+    @property
+    def m2_(self):
+        """Sum of squared deviations from the mean per profile, same shape as means_."""
+        return None if self._m2 is None else self._m2[: len(self)]
+
+    @property
+    def variances_(self):
+        """Per-profile population variance of every feature."""
+        return self.m2_ / np.maximum(self.counts_, 1)[:, None]
+
+    def update(self, X, authors):
+        """Merges documents into the profiles of their authors, creating profiles as needed.
+
+        Args:
+            X: WriteprintsStatic output, a scipy.sparse matrix or an array of shape (n, n_features).
+            authors: A list of n author labels.
+
+        Returns:
+            self.
+
+        Raises:
+            ValueError: an error if X and authors differ in length, or a vector has NaN or infinite values (e.g. the
+                rows of invalid documents with errors="fill"), which would spoil the profile of its author for good.
+        """
+        X = self._prepare(X)
+        if X.shape[0] != len(authors):
+            raise ValueError(
+                f"""{X.shape[0]} vectors and {len(authors)} authors received."""
+            )
+        finite = np.isfinite(X).all(axis=1)
+        if not finite.all():
+            raise ValueError(
+                f"""Finite vectors expected, rows {np.flatnonzero(~finite).tolist()} have NaN or infinite values."""
+            )
+        for author in authors:
+            if author not in self._positions:
+                self._positions[author] = len(self.authors_)
+                self.authors_.append(author)
+        self._grow(X.shape[1])
+
+        positions = np.array([self._positions[author] for author in authors])
+        updated, group = np.unique(positions, return_inverse=True)
+        # sums a group's rows with one sparse product
+        indicator = csr_matrix(
+            (np.ones(len(positions)), (group, np.arange(len(positions)))),
+            shape=(len(updated), len(positions)),
+        )
+        count = np.bincount(group, minlength=len(updated))
+        mean = np.asarray(indicator @ X) / count[:, None]
+        m2 = np.asarray(indicator @ np.square(X)) - count[:, None] * mean**2
+
+        seen = self._counts[updated]
+        total = seen + count
+        delta = mean - self._means[updated]
+        self._means[updated] += delta * (count / total)[:, None]
+        self._m2[updated] += (
+            np.maximum(m2, 0) + delta**2 * (seen * count / total)[:, None]
+        )
+        self._counts[updated] = total
+        return self
+
+    def update_texts(self, input, authors):
+        """Featurizes raw texts with the vectorizer batch by batch and merges them into the profiles.
+
+        Invalid documents, skipped or filled by a lenient vectorizer, are left out of the profiles.
+
+        Args:
+            input: A list of English raw texts (in string type).
+            authors: A list of author labels, one per text.
+
+        Returns:
+            self.
+        """
+        start = 0
+        for X in self.vectorizer.iter_transform(input):
+            stop = len(self.vectorizer.valid_mask_)
+            valid = self.vectorizer.valid_mask_[start:stop]
+            if X.shape[0] == len(valid):
+                X = X[valid]
+            self.update(X, [a for a, ok in zip(authors[start:stop], valid) if ok])
+            start = stop
+        return self
+
+    def score(self, X, metric="delta"):
+        """Distances between documents and every profile mean.
+
+        For "delta", z-scores are taken over the pooled statistics of all profiles.
+
+        Args:
+            X: WriteprintsStatic output, a scipy.sparse matrix or an array of shape (n, n_features).
+            metric: Any of metrics.METRICS.
+
+        Returns:
+            An array of shape (n, n_authors); column j is the distance to authors_[j].
+        """
+        X = self._prepare(X)
+        mean, std = self._pooled()
+        return metrics.distances(X, self.means_, metric, mean=mean, std=std)
+
+    def save(self, path):
+        """Writes the profiles to a compressed .npz file."""
+        np.savez_compressed(
+            path,
+            authors=np.array(self.authors_),
+            counts=self.counts_,
+            means=self.means_,
+            m2=self.m2_,
+        )
+
+    @classmethod
+    def load(cls, path, vectorizer=None, normalizer=None):
+        """Reads profiles written by save.
+
+        Author labels come back as str.
+        """
+        profiles = cls(vectorizer, normalizer)
+        with np.load(path) as data:
+            profiles.authors_ = data["authors"].tolist()
+            profiles._counts = data["counts"]
+            profiles._means = data["means"]
+            profiles._m2 = data["m2"]
+        profiles._positions = {
+            author: position for position, author in enumerate(profiles.authors_)
+        }
+        return profiles
+
+    def _prepare(self, X):
+        """Normalizes X if a normalizer is set, and returns it as a dense float64 array."""
+        if self.normalizer is not None:
+            X = self.normalizer.transform(X)
+        return (X.toarray() if issparse(X) else np.asarray(X)).astype(np.float64)
+
+    def _grow(self, n_features):
+        """Makes room for the profiles of newly seen authors, which start empty.
+
+        Capacity grows geometrically, so adding authors in many small batches is cheap.
+        """
+        if self._counts is not None and len(self) <= len(self._counts):
+            return
+        capacity = max(len(self), 0 if self._counts is None else 2 * len(self._counts))
+        counts = np.zeros(capacity, dtype=np.int64)
+        means = np.zeros((capacity, n_features))
+        m2 = np.zeros((capacity, n_features))
+        if self._counts is not None:
+            n = len(self._counts)
+            counts[:n], means[:n], m2[:n] = self._counts, self._means, self._m2
+        self._counts, self._means, self._m2 = counts, means, m2
+
+    def _pooled(self):
+        """Returns the mean and standard deviation of all documents of all profiles."""
+        n = self.counts_.sum()
+        mean = (self.counts_[:, None] * self.means_).sum(axis=0) / n
+        m2 = (self.m2_ + self.counts_[:, None] * (self.means_ - mean) ** 2).sum(axis=0)
+        return mean, np.sqrt(m2 / n)
@@ -0,0 +1,148 @@
+"""This module is used to stream documents out of compressed corpus files into WriteprintsStatic.
+
+Corpora come as JSON Lines files, possibly compressed with gzip, bzip2, or xz, and as tar bundles of text files,
+possibly compressed as well. The readers here decompress incrementally with the standard library codecs (gzip, bz2,
+lzma, tarfile in stream mode), so neither a decompressed copy on disk nor the whole corpus in memory is needed.
+
+Decompression releases the GIL, so prefetch runs a reader in a background thread, a bounded queue ahead of the
+consumer, and stream_transform uses it to overlap reading with parsing.
+"""
+
+import bz2
+import gzip
+import json
+import lzma
+import tarfile
+import threading
+from queue import Full, Queue
+
+# leading bytes of the compressed formats, and the openers of each
+MAGIC = (
+    (b"\x1f\x8b", gzip.open),
+    (b"BZh", bz2.open),
+    (b"\xfd7zXZ\x00", lzma.open),
+)
+
+
+def open_text(path, encoding="utf-8"):
+    """Opens a possibly compressed file for reading text, telling the compression from the first bytes."""
+    with open(path, "rb") as f:
+        head = f.read(6)
+    for magic, opener in MAGIC:
+        if head.startswith(magic):
+            return opener(path, "rt", encoding=encoding)
+    return open(path, "rt", encoding=encoding)
+
+
+def read_jsonl(path, text_key="text", id_key=None, encoding="utf-8"):
+    """Streams documents from a possibly compressed JSON Lines file.
+
+    Args:
+        path: The file, plain or compressed with gzip, bzip2, or xz.
+        text_key: Key of the raw text in every line. Lines holding a bare JSON string are taken as the text.
+        id_key: Key of the document id in every line, None to yield texts only.
+        encoding: Encoding of the file.
+
+    Yields:
+        Raw texts, or (id, raw text) tuples if id_key is given.
+    """
+    with open_text(path, encoding) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            text = record if isinstance(record, str) else record[text_key]
+            yield text if id_key is None else (record[id_key], text)
+
+
+def read_tar(path, suffixes=(".txt",), encoding="utf-8", names=False):
+    """Streams the text files of a possibly compressed tar bundle, in archive order.
+
+    The bundle is read in stream mode, so it is decompressed once, front to back.
+
+    Args:
+        path: The tar file, plain or compressed with gzip, bzip2, or xz.
+        suffixes: Only members whose names end with any of these are read, None for every regular file.
+        encoding: Encoding of the text files. Undecodable bytes are replaced.
+        names: Whether to yield the member names with the texts.
+
+    Yields:
+        Raw texts, or (member name, raw text) tuples if names is True.
+    """
+    with tarfile.open(path, mode="r|*") as tar:
+        for member in tar:
+            if not member.isfile():
+                continue
+            if suffixes is not None and not member.name.endswith(tuple(suffixes)):
+                continue
+            text = tar.extractfile(member).read().decode(encoding, errors="replace")
+            yield (member.name, text) if names else text
+
+
+def prefetch(iterable, buffer_size=1024):
+    """Iterates over iterable in a background thread, up to buffer_size items ahead of the consumer.
+
+    Exceptions raised by iterable are raised to the consumer. The thread stops if the consumer stops early.
+
+    Yields:
+        The items of iterable, in order.
+    """
+    queue = Queue(buffer_size)
+    stop = threading.Event()
+    end = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                if not _put(queue, (item, None), stop):
+                    return
+            _put(queue, (end, None), stop)
+        except BaseException as error:
+            _put(queue, (end, error), stop)
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = queue.get()
+            if item is end:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def stream_transform(vectorizer, documents, chunk_size=None, buffer_size=1024):
+    """Featurizes a stream of raw texts chunk by chunk, reading ahead in a background thread.
+
+    Args:
+        vectorizer: A WriteprintsStatic instance.
+        documents: An iterable of raw texts, e.g. read_jsonl(path) or read_tar(path).
+        chunk_size: Number of texts passed to vectorizer.iter_transform at a time, 10 batches by default.
+        buffer_size: Number of texts read ahead.
+
+    Yields:
+        A scipy.sparse.csr_matrix instance per batch, rows in stream order.
+    """
+    chunk_size = chunk_size or 10 * vectorizer.batch_size
+    chunk = []
+    for raw in prefetch(documents, buffer_size):
+        chunk.append(raw)
+        if len(chunk) == chunk_size:
+            yield from vectorizer.iter_transform(chunk)
+            chunk = []
+    if chunk:
+        yield from vectorizer.iter_transform(chunk)
+
+
+def _put(queue, item, stop):
+    """Puts item on a bounded queue unless stop is set first, returns whether it was put."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
@@ -0,0 +1,202 @@
+"""This module is used to hold the RevisionStore class.
+
+Successive revisions of a draft or a wiki page differ by a few paragraphs, but transform parses every version in full.
+Almost every Writeprints Static feature adds up over the paragraphs of a text (paragraphs being separated by blank
+lines, which hold nothing but whitespace):
+
+- counts (words, short words, letters, digits, special characters, n-grams, function words, POS, punctuation) add up
+  as they are;
+- avg_word_length, digits_ratio, and uppercase_ratio are ratios of counts which add up (characters in words, digits,
+  uppercase letters) over total_words or total_chars;
+- hapax_legomena_ratio and dis_legomena_ratio are taken over the word frequency table of the text, which is the sum
+  of the tables of its paragraphs;
+- total_chars is computed from the text itself.
+
+RevisionStore keeps, per document, the additive contribution and the word frequency table of every distinct paragraph
+it has parsed, and their sums. A new revision is compared with the former one as a multiset of paragraph digests:
+paragraphs gone are subtracted, new paragraphs are parsed and added, and paragraphs kept or moved cost nothing.
+
+Known differences with transform: every paragraph is tagged on its own, so a POS tag may differ where the tagger would
+have looked across a blank line.
+"""
+
+import hashlib
+from collections import Counter
+import numpy as np
+from scipy.sparse import csr_matrix
+from writeprints_static import base
+from writeprints_static.sampling import PARAGRAPH_PATTERN, RATIO_DENOMINATORS
+
+
+class RevisionStore(object):
+    """RevisionStore
+
+    Features of revised documents, updated paragraph by paragraph.
+
+    Attributes:
+        vectorizer: A WriteprintsStatic instance, fitted if it learns n-grams.
+        documents_: A dict of the state of every document, by key.
+        n_parsed_: Number of paragraphs parsed by the last update.
+    """
+
+    def __init__(self, vectorizer):
+        """Initiates RevisionStore."""
+        self.vectorizer = vectorizer
+        self.documents_ = {}
+        self.n_parsed_ = 0
+
+    def __len__(self):
+        """Returns the number of documents."""
+        return len(self.documents_)
+
+    def __contains__(self, key):
+        return key in self.documents_
+
+    def update(self, key, raw):
+        """Featurizes a new revision of a document, or the first one if the key is new.
+
+        Args:
+            key: Any hashable identifying the document.
+            raw: The English raw text of the revision (in string type).
+
+        Returns:
+            A scipy.sparse.csr_matrix instance of shape (1, n_features), the row transform would return for raw.
+
+        Raises:
+            ValueError: an error if raw is not a string.
+        """
+        if not isinstance(raw, str):
+            raise ValueError(
+                f"""Raw text document expected, {type(raw)} object received."""
+            )
+        names = self.vectorizer.get_feature_names()
+        document = self.documents_.get(key)
+        if document is None:
+            document = self.documents_[key] = _Document(len(names))
+
+        paragraphs = [
+            paragraph for paragraph in PARAGRAPH_PATTERN.split(raw) if paragraph.strip()
+        ]
+        digests = [_digest(paragraph) for paragraph in paragraphs]
+        texts = dict(zip(digests, paragraphs))
+        multiplicity = Counter(digests)
+        new = [digest for digest in multiplicity if digest not in document.paragraphs]
+        self._parse(document, [texts[digest] for digest in new], new, names)
+        self.n_parsed_ = len(new)
+
+        for digest, change in (multiplicity - document.multiplicity).items():
+            document.add(digest, change)
+        for digest, change in (document.multiplicity - multiplicity).items():
+            document.add(digest, -change)
+        document.multiplicity = multiplicity
+        # only the paragraphs of the current revision are kept
+        for digest in list(document.paragraphs):
+            if digest not in multiplicity:
+                del document.paragraphs[digest]
+        return csr_matrix(document.features(names, len(raw.rstrip())))
+
+    def remove(self, key):
+        """Forgets a document."""
+        del self.documents_[key]
+
+    def _parse(self, document, paragraphs, digests, names):
+        """Parses paragraphs and stores the additive contribution and the word frequency table of each."""
+        if not paragraphs:
+            return
+        max_length = max(1000000, round(max(map(len, paragraphs)) * 1.1))
+        _, word_tokens, tags = base._parse(
+            self.vectorizer.model,
+            max_length,
+            paragraphs,
+            self.vectorizer.router,
+            self.vectorizer.max_models,
+        )
+        results, _ = base._extract(
+            paragraphs, word_tokens, tags, self.vectorizer._vocabularies()
+        )
+        values = np.concatenate(results, axis=1).astype(np.float64)
+        # ratio columns are turned back into the counts they are taken over
+        for name, denominator in RATIO_DENOMINATORS.items():
+            column, base_column = names.index(name), names.index(denominator)
+            values[:, column] = np.nan_to_num(
+                values[:, column] * values[:, base_column]
+            )
+        # columns which are not sums are computed from the document as a whole
+        values[
+            :,
+            [
+                names.index(name)
+                for name in (
+                    "total_chars",
+                    "hapax_legomena_ratio",
+                    "dis_legomena_ratio",
+                )
+            ],
+        ] = 0
+        values = np.nan_to_num(values)
+
+        ids = np.array(
+            [document.word_id(word) for word in word_tokens.vocab], dtype=np.int64
+        )
+        counts = word_tokens.counts()
+        for row, digest in enumerate(digests):
+            start, stop = counts.indptr[row], counts.indptr[row + 1]
+            document.paragraphs[digest] = (
+                csr_matrix(values[row]),
+                ids[counts.indices[start:stop]].astype(np.int32),
+                counts.data[start:stop].astype(np.int32),
+            )
+
+
+class _Document(object):
+    """The state of a document: the contributions of its paragraphs and their sums."""
+
+    def __init__(self, n_features):
+        self.multiplicity = Counter()
+        self.paragraphs = {}
+        self.vocab = {}
+        self.frequencies = np.zeros(0, dtype=np.int64)
+        self.totals = np.zeros(n_features)
+
+    def word_id(self, word):
+        """Returns the id of a word, adding it to the vocabulary if needed."""
+        return self.vocab.setdefault(word, len(self.vocab))
+
+    def add(self, digest, times):
+        """Adds the contribution of a paragraph times times, subtracts it if times is negative."""
+        row, ids, counts = self.paragraphs[digest]
+        self.totals[row.indices] += times * row.data
+        if len(self.frequencies) < len(self.vocab):
+            self.frequencies = np.concatenate(
+                [
+                    self.frequencies,
+                    np.zeros(len(self.vocab) - len(self.frequencies), dtype=np.int64),
+                ]
+            )
+        self.frequencies[ids] += times * counts.astype(np.int64)
+
+    def features(self, names, total_chars):
+        """Returns the feature row of the document from the sums."""
+        values = self.totals.copy()
+        values[names.index("total_chars")] = total_chars
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for name, denominator in RATIO_DENOMINATORS.items():
+                values[names.index(name)] = (
+                    self.totals[names.index(name)] / values[names.index(denominator)]
+                )
+            distinct = np.count_nonzero(self.frequencies)
+            # a dis legomenon occurs twice, see lexical_features.dis_legomena_ratio_extractor
+            values[names.index("hapax_legomena_ratio")] = (
+                np.count_nonzero(self.frequencies == 1) / distinct
+            )
+            values[names.index("dis_legomena_ratio")] = (
+                np.count_nonzero(self.frequencies == 2) / distinct
+            )
+        return values[None, :]
+
+
+def _digest(paragraph):
+    """Returns a digest of the text of a paragraph."""
+    return hashlib.blake2b(
+        paragraph.encode("utf-8", "surrogatepass"), digest_size=16
+    ).digest()
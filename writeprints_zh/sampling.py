@@ -0,0 +1,251 @@
+"""This module is used to approximate the Writeprints Static features of long documents within a time budget.
+
+Parsing is what costs: a whole book takes far longer than an interactive triage can wait. approximate parses a sample
+of the document's paragraphs instead and estimates the features of the whole document from it, with standard errors:
+
+- Paragraphs are split into `n_strata` strata of consecutive paragraphs (so the beginning, the middle, and the end of
+  a book are all represented), and drawn at random within each stratum, in proportion to its size.
+- Count features add up over paragraphs and are estimated by the stratified total, sum_h N_h * mean_h, with variance
+  sum_h N_h^2 (1 - n_h / N_h) s_h^2 / n_h.
+- avg_word_length, digits_ratio, and uppercase_ratio are ratios of two totals (e.g. digits over total_chars) and are
+  estimated by the ratio of the estimated totals, with the linearized (Taylor) variance of a ratio estimator.
+- hapax_legomena_ratio and dis_legomena_ratio depend on the vocabulary of the whole text, not on a sum over paragraphs.
+  They are taken over the pooled words of the sample, with a delete-a-group jackknife standard error. Note that they
+  are biased upwards: a sample has relatively more words seen once than the whole document.
+- total_chars is computed exactly.
+
+Without a fixed `fraction`, the fraction is chosen from `deadline`: a pilot of one paragraph per stratum is parsed
+first to measure the parsing throughput (once the spaCy pipelines are loaded, so that a cold start counts neither as
+parsing nor against the deadline), and the sample is the pilot plus what can be parsed in the time left.
+"""
+
+import re
+import time
+import numpy as np
+from writeprints_static import base, models
+from writeprints_static.tokens import TokenTable
+
+# ratio features and the count feature they are taken over
+RATIO_DENOMINATORS = {
+    "avg_word_length": "total_words",
+    "digits_ratio": "total_chars",
+    "uppercase_ratio": "total_chars",
+}
+LEGOMENA_FEATURES = ("hapax_legomena_ratio", "dis_legomena_ratio")
+# paragraphs are blocks of text separated by blank lines
+PARAGRAPH_PATTERN = re.compile(r"\n\s*\n")
+
+
+def approximate(
+    vectorizer,
+    raw,
+    deadline=1.0,
+    fraction=None,
+    n_strata=10,
+    block_size=2000,
+    random_state=None,
+):
+    """Estimates the Writeprints Static features of a document from a stratified sample of its paragraphs.
+
+    Documents too short to be split into at least two paragraphs per stratum, or whose sample would be the whole
+    document, are featurized exactly, with zero standard errors.
+
+    Args:
+        vectorizer: A WriteprintsStatic instance. Paragraphs are parsed in this process whatever its n_jobs, with the
+            pipelines of models.POOL.
+        raw: An English raw text (in string type).
+        deadline: Time budget in seconds, used to choose the fraction when it is None.
+        fraction: Fraction of the paragraphs to parse, None to choose it from deadline.
+        n_strata: Number of strata of consecutive paragraphs.
+        block_size: Paragraphs are split into blocks of about this many characters, at whitespace, when the document
+            has too few of them.
+        random_state: Seed or numpy.random.Generator of the sample.
+
+    Returns:
+        A tuple of the estimated features, a float64 array of shape (n_features,), their standard errors, of the same
+        shape, and the fraction of paragraphs parsed.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(random_state)
+    names = vectorizer.get_feature_names()
+    paragraphs = _paragraphs(raw, 2 * n_strata, block_size)
+    if len(paragraphs) < 2 * n_strata:
+        return _exact(vectorizer, raw)
+    strata = np.arange(len(paragraphs)) * n_strata // len(paragraphs)
+    sizes = np.bincount(strata, minlength=n_strata)
+    pilot, X_pilot = np.zeros(0, dtype=np.int64), None
+    if fraction is None:
+        # one paragraph per stratum, kept in the sample
+        pilot = np.array(
+            [rng.choice(np.flatnonzero(strata == h)) for h in range(n_strata)]
+        )
+        texts = [paragraphs[i] for i in pilot]
+        # the pipelines are loaded first, so that loading counts neither as parsing nor against the deadline
+        load_start = time.perf_counter()
+        models.POOL.max_models = vectorizer.max_models
+        for name in models.route(vectorizer.model, vectorizer.router, texts):
+            models.POOL.get(name)
+        start += time.perf_counter() - load_start
+        pilot_start = time.perf_counter()
+        X_pilot, pilot_tokens = _featurize(vectorizer, texts)
+        elapsed = time.perf_counter() - pilot_start
+        throughput = sum(map(len, texts)) / max(elapsed, 1e-6)
+        remaining = deadline - (time.perf_counter() - start)
+        fraction = (max(0.0, remaining) * throughput + sum(map(len, texts))) / len(raw)
+    if fraction >= 1:
+        return _exact(vectorizer, raw)
+
+    # two paragraphs per stratum at least, for the variance
+    drawn = np.minimum(sizes, np.maximum(2, np.round(fraction * sizes).astype(int)))
+    extra = np.concatenate(
+        [
+            rng.choice(
+                np.setdiff1d(np.flatnonzero(strata == h), pilot),
+                drawn[h] - np.count_nonzero(strata[pilot] == h),
+                False,
+            )
+            for h in range(n_strata)
+        ]
+    ).astype(np.int64)
+    sample = np.concatenate([pilot, extra])
+    X, tokens = _featurize(vectorizer, [paragraphs[i] for i in extra])
+    if X_pilot is not None:
+        X = np.vstack([X_pilot, X])
+        tokens = TokenTable.concatenate([pilot_tokens, tokens])
+
+    values, errors = _stratified_totals(X, strata[sample], sizes, drawn)
+    for name, denominator in RATIO_DENOMINATORS.items():
+        column, base = names.index(name), names.index(denominator)
+        values[column], errors[column] = _ratio(
+            X[:, column] * X[:, base], X[:, base], strata[sample], sizes, drawn
+        )
+    counts = tokens.counts()
+    for column, (value, error) in zip(
+        [names.index(name) for name in LEGOMENA_FEATURES],
+        _jackknife_legomena(counts, rng),
+    ):
+        values[column], errors[column] = value, error
+    column = names.index("total_chars")
+    values[column], errors[column] = len(raw.rstrip()), 0.0
+    return values, errors, len(sample) / len(paragraphs)
+
+
+def _featurize(vectorizer, paragraphs):
+    """Parses and extracts paragraphs as documents of their own, in this process.
+
+    Paragraphs without word tokens (e.g. a "* * *" scene break) keep their character and punctuation counts; their
+    undefined ratios count as 0.
+
+    Returns:
+        A tuple of the float64 values, an array of shape (len(paragraphs), n_features), and a TokenTable of the word
+        tokens.
+    """
+    max_length = max(1000000, round(max(map(len, paragraphs)) * 1.1))
+    _, word_tokens, tags = base._parse(
+        vectorizer.model,
+        max_length,
+        paragraphs,
+        vectorizer.router,
+        vectorizer.max_models,
+    )
+    values = base._values(paragraphs, word_tokens, tags, vectorizer._vocabularies())
+    return np.nan_to_num(values.astype(np.float64)), word_tokens
+
+
+def _exact(vectorizer, raw):
+    """Featurizes a document as a whole, with zero standard errors."""
+    values = vectorizer.transform([raw]).toarray().ravel().astype(np.float64)
+    return values, np.zeros_like(values), 1.0
+
+
+def _paragraphs(raw, minimum, block_size):
+    """Splits a text into non-blank paragraphs, or into blocks of about block_size characters if there are fewer than
+    minimum paragraphs."""
+    paragraphs = [
+        paragraph for paragraph in PARAGRAPH_PATTERN.split(raw) if paragraph.strip()
+    ]
+    if len(paragraphs) >= minimum:
+        return paragraphs
+    blocks, start = [], 0
+    while start < len(raw):
+        stop = start + block_size
+        # extends the block to the next whitespace, so no word is cut
+        match = re.compile(r"\s").search(raw, stop)
+        stop = len(raw) if match is None else match.end()
+        if raw[start:stop].strip():
+            blocks.append(raw[start:stop])
+        start = stop
+    return blocks
+
+
+def _stratified_totals(X, strata, sizes, drawn):
+    """Returns the stratified estimate of the column totals of a population from the rows of a sample, and its
+    standard error.
+
+    Args:
+        X: Sampled rows, an array of shape (n, n_features).
+        strata: The stratum of every sampled row.
+        sizes: Number of population rows per stratum.
+        drawn: Number of sampled rows per stratum.
+    """
+    totals = np.zeros(X.shape[1])
+    variances = np.zeros(X.shape[1])
+    for h in range(len(sizes)):
+        rows = X[strata == h]
+        totals += sizes[h] * rows.mean(axis=0)
+        if drawn[h] > 1:
+            variances += (
+                sizes[h] ** 2
+                * (1 - drawn[h] / sizes[h])
+                * rows.var(axis=0, ddof=1)
+                / drawn[h]
+            )
+    return totals, np.sqrt(variances)
+
+
+def _ratio(numerators, denominators, strata, sizes, drawn):
+    """Returns the ratio estimate of a ratio of two population totals and its linearized standard error."""
+    (numerator, denominator), _ = _stratified_totals(
+        np.column_stack([numerators, denominators]), strata, sizes, drawn
+    )
+    if denominator == 0:
+        return np.nan, np.nan
+    ratio = numerator / denominator
+    _, (error,) = _stratified_totals(
+        (numerators - ratio * denominators)[:, None], strata, sizes, drawn
+    )
+    return ratio, error / denominator
+
+
+def _jackknife_legomena(counts, rng, n_groups=10):
+    """Returns the hapax and dis legomena ratios of the pooled words of a sample and their delete-a-group jackknife
+    standard errors.
+
+    Args:
+        counts: Document-term counts of the sampled paragraphs, a scipy.sparse matrix of shape (n, n_vocab).
+        rng: A numpy.random.Generator used to form the groups.
+        n_groups: Number of groups of paragraphs left out in turn.
+
+    Returns:
+        Two tuples, of the value and standard error of hapax_legomena_ratio and of dis_legomena_ratio.
+    """
+    n_groups = min(n_groups, counts.shape[0])
+    groups = rng.permutation(counts.shape[0]) % n_groups
+    sums = np.vstack(
+        [np.asarray(counts[groups == g].sum(axis=0)).ravel() for g in range(n_groups)]
+    )
+    # the pooled counts first, then the pooled counts without each group
+    pooled = np.vstack([sums.sum(axis=0), sums.sum(axis=0) - sums])
+    distinct = (pooled > 0).sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # a dis legomenon occurs twice, see lexical_features.dis_legomena_ratio_extractor
+        ratios = [(pooled == times).sum(axis=1) / distinct for times in (1, 2)]
+    return [
+        (
+            ratio[0],
+            np.sqrt(
+                (n_groups - 1) / n_groups * np.sum((ratio[1:] - ratio[1:].mean()) ** 2)
+            ),
+        )
+        for ratio in ratios
+    ]
@@ -0,0 +1,110 @@
+"""This module is used to size WriteprintsStatic parse batches to a memory budget.
+
+A fixed batch size suits neither tweets nor transcripts: short texts leave the pipeline underused and a few long texts
+in one batch make memory spike, since a spaCy doc costs memory per token. BatchScheduler plans batches by size
+instead:
+
+- documents are taken a window at a time and sorted by length within the window, so a batch holds texts of similar
+  length and long texts are not scattered over every batch;
+- a batch is closed before its estimated token count (characters / chars_per_token) would exceed the headroom left
+  under the memory budget by the resident set size (RSS) measured when the batch is planned, shared by the workers;
+- positions are kept with every batch, so rows can be put back in input order once a window is done.
+"""
+
+import math
+import os
+import numpy as np
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+
+class BatchScheduler(object):
+    """BatchScheduler
+
+    Plans batches of documents under a memory budget.
+
+    Attributes:
+        memory_budget: Upper bound in bytes of the resident memory of the process.
+        max_batch_size: Largest number of documents per batch.
+        max_chars: Largest number of characters per batch, None for no bound but the memory budget.
+        window: Number of consecutive documents sorted by length at a time.
+        n_workers: Number of workers batches are parsed by at the same time, which share the headroom.
+        chars_per_token: Average characters per token, used to estimate token counts.
+        bytes_per_token: Estimated memory of a parsed token, spaCy doc and intermediates included.
+    """
+
+    def __init__(
+        self,
+        memory_budget,
+        max_batch_size=1000,
+        max_chars=None,
+        window=10000,
+        n_workers=1,
+        chars_per_token=4.0,
+        bytes_per_token=1024,
+    ):
+        """Initiates BatchScheduler."""
+        self.memory_budget = memory_budget
+        self.max_batch_size = max_batch_size
+        self.max_chars = max_chars
+        self.window = window
+        self.n_workers = n_workers
+        self.chars_per_token = chars_per_token
+        self.bytes_per_token = bytes_per_token
+
+    def schedule(self, lengths):
+        """Plans the batches of documents of the given lengths.
+
+        The headroom is measured each time a batch is started, so the plan adapts to the memory actually in use. A
+        batch always holds at least one document, however long.
+
+        Args:
+            lengths: Number of characters of every document, in input order.
+
+        Yields:
+            A tuple of an int64 array of the input positions of a batch and whether the batch is the last one of its
+            window. Together, the batches of a window hold every position of the window exactly once.
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        tokens = np.ceil(lengths / self.chars_per_token).astype(np.int64) + 1
+        for start in range(0, len(lengths), self.window):
+            stop = min(start + self.window, len(lengths))
+            order = start + np.argsort(lengths[start:stop], kind="stable")
+            first = 0
+            while first < len(order):
+                max_tokens = max(1, self.headroom() // self.bytes_per_token)
+                max_chars = math.inf if self.max_chars is None else self.max_chars
+                # the longest prefix of the next documents within all bounds, and at least one document
+                candidates = order[first : first + self.max_batch_size]
+                beyond = np.flatnonzero(
+                    (np.cumsum(tokens[candidates]) > max_tokens)
+                    | (np.cumsum(lengths[candidates]) > max_chars)
+                )
+                size = max(beyond[0], 1) if len(beyond) else len(candidates)
+                yield order[first : first + size], first + size == len(order)
+                first += size
+
+    def headroom(self):
+        """Returns the memory in bytes a worker may use for its batch: its share of the budget left over by RSS."""
+        return max(0, self.memory_budget - rss()) // max(1, self.n_workers)
+
+
+def rss():
+    """Returns the resident set size of the process in bytes.
+
+    It is read from /proc/self/statm on Linux. Elsewhere, the peak resident set size is used instead, or 0 if it is
+    not available either.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    if resource is None:
+        return 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
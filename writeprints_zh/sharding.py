@@ -0,0 +1,183 @@
+"""This module is used to featurize a corpus in shards, e.g. on several machines, and to merge the shards back.
+
+A corpus manifest is a JSON Lines file with one document per line, an object holding its id and its text. Shard k of
+n covers a contiguous range of lines, so shards merged in order are rows in manifest order.
+
+extract_shard writes a self-describing shard directory: the rows as CSR triplets (see export.CSRWriter), the ids of
+the documents they belong to, and a shard.json recording the position of the shard, a hash of the feature schema, and
+the vectorizer configuration and its hash. The directory is built under a temporary name and renamed once complete, so
+a shard directory is never partial.
+
+merge_shards checks that the shards belong together (same corpus size, shard count, schema, and configuration) and
+that none is missing or repeated, then streams their rows in order into one matrix or into any export format, a slice
+of memory-mapped rows at a time.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+from scipy.sparse import vstack
+from writeprints_static.export import CSRWriter, open_writer, read_csr
+from writeprints_static.jobs import config_hash, config_params
+
+
+def extract_shard(
+    vectorizer,
+    corpus,
+    shard_id,
+    shard_count,
+    path,
+    id_key="id",
+    text_key="text",
+    chunk_size=10000,
+):
+    """Featurizes one shard of a corpus manifest.
+
+    Args:
+        vectorizer: A WriteprintsStatic instance, fitted if it learns n-grams. With errors="skip", the rows and ids of
+            invalid documents are left out.
+        corpus: Path of the corpus manifest, a JSON Lines file.
+        shard_id: Index of the shard, from 0 to shard_count - 1.
+        shard_count: Number of shards the corpus is split into.
+        path: The directory the shard is written to.
+        id_key: Key of the document id in every line.
+        text_key: Key of the raw text in every line.
+        chunk_size: Number of documents read and featurized at a time.
+
+    Returns:
+        The shard metadata written to shard.json.
+
+    Raises:
+        ValueError: an error if shard_id is out of range.
+    """
+    if not 0 <= shard_id < shard_count:
+        raise ValueError(
+            f"""Shard id between 0 and {shard_count - 1} expected, {shard_id} received."""
+        )
+    with open(corpus, "rb") as f:
+        n_documents = sum(1 for line in f if line.strip())
+    start = shard_id * n_documents // shard_count
+    stop = (shard_id + 1) * n_documents // shard_count
+    feature_names = vectorizer.get_feature_names()
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    row_ids = []
+    with CSRWriter(tmp_path, feature_names) as writer:
+        for ids, texts in _read_range(
+            corpus, start, stop, id_key, text_key, chunk_size
+        ):
+            writer.write(vectorizer.transform(texts))
+            if vectorizer.errors == "skip":
+                ids = [i for i, valid in zip(ids, vectorizer.valid_mask_) if valid]
+            row_ids.extend(ids)
+    meta = {
+        "shard_id": shard_id,
+        "shard_count": shard_count,
+        "n_documents": n_documents,
+        "start": start,
+        "stop": stop,
+        "n_rows": len(row_ids),
+        "schema_hash": schema_hash(feature_names),
+        "config_hash": config_hash(vectorizer),
+        "config": config_params(vectorizer),
+    }
+    with open(os.path.join(tmp_path, "row_ids.json"), "w") as f:
+        json.dump(row_ids, f)
+    with open(os.path.join(tmp_path, "shard.json"), "w") as f:
+        json.dump(meta, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(tmp_path, path)
+    return meta
+
+
+def merge_shards(paths, path=None, format="npy", chunk_size=10000):
+    """Validates shards written by extract_shard and concatenates them in corpus order.
+
+    Args:
+        paths: The shard directories, in any order.
+        path: The output directory ("npy") or file ("arrow", "parquet"). None to return the rows as one
+            scipy.sparse.csr_matrix instance.
+        format: Any of export.FORMATS.
+        chunk_size: Number of rows copied at a time.
+
+    Returns:
+        A tuple of the merged rows, a csr_matrix if path is None and else the number of rows written, and the list of
+        row ids.
+
+    Raises:
+        ValueError: an error if the shards do not belong to the same extraction or do not cover the whole corpus.
+    """
+    shards = []
+    for shard_path in paths:
+        with open(os.path.join(shard_path, "shard.json")) as f:
+            shards.append((json.load(f), shard_path))
+    if not shards:
+        raise ValueError("""No shard received.""")
+    shards.sort(key=lambda shard: shard[0]["shard_id"])
+    for key in ("shard_count", "n_documents", "schema_hash", "config_hash"):
+        values = {meta[key] for meta, _ in shards}
+        if len(values) > 1:
+            raise ValueError(f"""Shards disagree on {key}: {sorted(values)}.""")
+    shard_count = shards[0][0]["shard_count"]
+    found = [meta["shard_id"] for meta, _ in shards]
+    if found != list(range(shard_count)):
+        raise ValueError(
+            f"""Shards 0 to {shard_count - 1} expected once each, {found} received."""
+        )
+
+    row_ids = []
+    for _, shard_path in shards:
+        with open(os.path.join(shard_path, "row_ids.json")) as f:
+            row_ids.extend(json.load(f))
+    chunks = _iter_chunks([shard_path for _, shard_path in shards], chunk_size)
+    if path is None:
+        return vstack(list(chunks), format="csr"), row_ids
+    _, feature_names = read_csr(shards[0][1])
+    with open_writer(path, feature_names, format) as writer:
+        for X in chunks:
+            writer.write(X)
+    with open(_row_ids_path(path, format), "w") as f:
+        json.dump(row_ids, f)
+    return writer.n_rows, row_ids
+
+
+def schema_hash(feature_names):
+    """Returns a hash of a list of feature names, in order."""
+    return hashlib.sha256(json.dumps(list(feature_names)).encode()).hexdigest()
+
+
+def _read_range(corpus, start, stop, id_key, text_key, chunk_size):
+    """Yields the ids and texts of the documents [start, stop) of a corpus manifest, chunk_size at a time."""
+    ids, texts = [], []
+    with open(corpus, encoding="utf-8") as f:
+        lines = (line for line in f if line.strip())
+        for position, line in enumerate(lines):
+            if position >= stop:
+                break
+            if position < start:
+                continue
+            record = json.loads(line)
+            ids.append(record[id_key])
+            texts.append(record[text_key])
+            if len(texts) == chunk_size:
+                yield ids, texts
+                ids, texts = [], []
+    if texts:
+        yield ids, texts
+
+
+def _iter_chunks(paths, chunk_size):
+    """Yields the rows of memory-mapped shards in order, chunk_size rows at a time."""
+    for shard_path in paths:
+        X, _ = read_csr(shard_path)
+        for start in range(0, X.shape[0], chunk_size):
+            yield X[start : start + chunk_size]
+
+
+def _row_ids_path(path, format):
+    """Returns where the row ids of merged output go: inside an output directory, or next to an output file."""
+    if format == "npy":
+        return os.path.join(path, "row_ids.json")
+    return f"{path}.row_ids.json"
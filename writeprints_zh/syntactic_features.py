@@ -5,6 +5,7 @@ known differences between the original feature and our engineering.
 """
 
 import re
+import numpy as np
 
 # fmt: off
 FUNCTION_WORDS = ['a', "he's", 'since', 'about', 'highly', 'above', 'him', 'absolutely', 'himself', 'so', 'across',
@@ -97,14 +98,25 @@ def pos_extractor(tags):
     original tagset.
 
     Args:
-        tags: List of lists of token.pos_ in spaCy doc instances.
+        tags: A TokenTable of token.pos_ in spaCy doc instances.
 
     Returns:
         Frequencies of POS in the document.
     """
-    pos_ = [
-        [tag.count(universal_tag) for universal_tag in UNIVERSAL_TAGS] for tag in tags
-    ]
+    # maps every tag in the batch vocabulary to its universal tag column
+    columns = np.array(
+        [
+            UNIVERSAL_TAGS.index(tag) if tag in UNIVERSAL_TAGS else -1
+            for tag in tags.vocab
+        ],
+        dtype=np.int64,
+    )[tags.ids]
+    rows = np.repeat(np.arange(len(tags)), tags.lengths())
+    known = columns >= 0
+    pos_ = np.bincount(
+        rows[known] * len(UNIVERSAL_TAGS) + columns[known],
+        minlength=len(tags) * len(UNIVERSAL_TAGS),
+    ).reshape(len(tags), len(UNIVERSAL_TAGS))
     label = ["pos_" + universal_tag for universal_tag in UNIVERSAL_TAGS]
 
     return pos_, label
@@ -0,0 +1,114 @@
+"""This module is used to hold the compact token storage for the WriteprintsStatic class.
+
+Word tokens and POS tags of a batch are stored integer-encoded rather than as lists of lists of strings: one vocabulary
+of distinct strings shared by all documents in the batch, a flat array of token ids, and per-document offsets into it
+(the same layout as scipy.sparse.csr_matrix). Word-level extractors then run as array operations on the document-term
+count matrix instead of Python loops over tokens.
+"""
+
+from array import array
+import numpy as np
+from scipy.sparse import csr_matrix
+
+
+class TokenTable(object):
+    """TokenTable
+
+    Integer-encoded tokens of a batch of documents.
+
+    The tokens of document i are `[vocab[j] for j in ids[offsets[i]:offsets[i + 1]]]`.
+
+    Attributes:
+        vocab: A list of distinct token strings, indexed by token id.
+        ids: A flat numpy.int32 array of token ids, documents concatenated in order.
+        offsets: A numpy.int64 array of n_docs + 1 offsets into ids.
+    """
+
+    def __init__(self, vocab, ids, offsets):
+        """Initiates TokenTable."""
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+        self._counts = None
+        self._vocab_lengths = None
+
+    @classmethod
+    def from_lists(cls, token_lists):
+        """Encodes token strings.
+
+        Args:
+            token_lists: An iterable of iterables of token strings, one per document. Generators are consumed lazily,
+                so the nested lists need never exist.
+
+        Returns:
+            A TokenTable instance.
+        """
+        index = {}
+        ids = array("i")
+        offsets = array("q", [0])
+        for tokens in token_lists:
+            ids.extend(index.setdefault(token, len(index)) for token in tokens)
+            offsets.append(len(ids))
+        return cls(
+            list(index),
+            np.frombuffer(ids, dtype=np.int32),
+            np.frombuffer(offsets, dtype=np.int64),
+        )
+
+    @classmethod
+    def concatenate(cls, tables):
+        """Stacks TokenTable instances document-wise under a merged vocabulary."""
+        index = {}
+        ids, offsets, total = [], [np.zeros(1, dtype=np.int64)], 0
+        for table in tables:
+            remap = np.array(
+                [index.setdefault(token, len(index)) for token in table.vocab],
+                dtype=np.int32,
+            )
+            ids.append(remap[table.ids])
+            offsets.append(table.offsets[1:] + total)
+            total += len(table.ids)
+        return cls(
+            list(index),
+            np.concatenate(ids) if ids else np.zeros(0, dtype=np.int32),
+            np.concatenate(offsets),
+        )
+
+    def __len__(self):
+        """Returns the number of documents."""
+        return len(self.offsets) - 1
+
+    def lengths(self):
+        """Returns the number of tokens of every document."""
+        return np.diff(self.offsets)
+
+    def vocab_lengths(self):
+        """Returns the number of characters of every vocabulary entry."""
+        if self._vocab_lengths is None:
+            self._vocab_lengths = np.fromiter(
+                map(len, self.vocab), dtype=np.int64, count=len(self.vocab)
+            )
+        return self._vocab_lengths
+
+    def counts(self):
+        """Returns the document-term count matrix.
+
+        Returns:
+            A scipy.sparse.csr_matrix instance of shape (n_docs, len(vocab)) with sorted, duplicate-free indices.
+        """
+        if self._counts is None:
+            counts = csr_matrix(
+                (np.ones(len(self.ids), dtype=np.int64), self.ids, self.offsets),
+                shape=(len(self), len(self.vocab)),
+                copy=True,
+            )
+            counts.sum_duplicates()
+            self._counts = counts
+        return self._counts
+
+    def to_lists(self):
+        """Decodes back to a list of lists of token strings."""
+        return [
+            [self.vocab[i] for i in self.ids[start:stop]]
+            for start, stop in zip(self.offsets[:-1], self.offsets[1:])
+        ]